@@ -0,0 +1,158 @@
+"""Patterns and inputs the benchmarks run over.
+
+Every case has a pattern in the grammar of this library, the same pattern for
+the re module when it needs to be written differently, a text it fully matches,
+and a longer text to search in.
+"""
+from __future__ import annotations
+
+import random
+from typing import List, NamedTuple, Optional
+
+
+class Case(NamedTuple):
+    name: str
+    family: str
+    pattern: str
+    matching: str
+    haystack: str
+    re_pattern: Optional[str] = None
+
+
+def _repeat(atom: str, n: int) -> str:
+    # The grammar has no counted repetition, so {n} is written out
+    return atom * n
+
+
+def _words(n: int, seed: int = 0) -> List[str]:
+    rand = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < n:
+        words.add("".join(rand.choice(letters) for _ in range(rand.randint(4, 10))))
+    return sorted(words)
+
+
+def _noise(n: int, alphabet: str, seed: int = 1) -> str:
+    rand = random.Random(seed)
+    return "".join(rand.choice(alphabet) for _ in range(n))
+
+
+def _pathological() -> List[Case]:
+    cases = []
+    for n in (10, 100):
+        cases.append(
+            Case(
+                name=f"(a|aa)* n={n}",
+                family="pathological",
+                pattern="(a|aa)*",
+                matching="a" * n,
+                haystack="a" * n * 10 + "b",
+            )
+        )
+    for n in (4, 8, 10):
+        cases.append(
+            Case(
+                name=f"(a|b)*a(a|b){{{n}}}",
+                family="pathological",
+                pattern="(a|b)*a" + _repeat("(a|b)", n),
+                matching=_noise(200, "ab") + "a" + "b" * n,
+                haystack=_noise(10_000, "ab"),
+                re_pattern=f"(a|b)*a(a|b){{{n}}}",
+            )
+        )
+    literal = _noise(500, "abcdefgh", seed=2)
+    cases.append(
+        Case(
+            name="long literal 500",
+            family="pathological",
+            pattern=literal,
+            matching=literal,
+            haystack=_noise(20_000, "abcdefgh", seed=3) + literal,
+        )
+    )
+    for n in (50, 500):
+        words = _words(n)
+        cases.append(
+            Case(
+                name=f"alternation of {n} words",
+                family="pathological",
+                pattern="|".join(words),
+                matching=words[n // 2],
+                haystack=_noise(20_000, "abcdefghijklmnopqrstuvwxyz ") + words[-1],
+            )
+        )
+    cases.append(
+        Case(
+            name="wide classes",
+            family="pathological",
+            pattern="[Ā-￿]+[^a-z0-9]*[α-ωА-я]+",
+            matching="日本語の文章！!αβγ",
+            haystack=_noise(20_000, "abc日本語 ") + "日本!αβ",
+        )
+    )
+    return cases
+
+
+def _real_world() -> List[Case]:
+    digit = "[0-9]"
+    octet = f"{digit}{digit}?{digit}?"
+    log = "2024-05-01 12:00:00 INFO request served in 12ms\n"
+    return [
+        Case(
+            name="email",
+            family="real-world",
+            pattern="[a-zA-Z0-9._%+\\-]+@[a-zA-Z0-9.\\-]+\\.[a-zA-Z]+",
+            matching="first.last+tag@mail.example.com",
+            haystack=log * 400 + "contact: someone@example.org",
+        ),
+        Case(
+            name="ipv4",
+            family="real-world",
+            pattern=f"{octet}\\.{octet}\\.{octet}\\.{octet}",
+            matching="192.168.100.254",
+            haystack=log * 400 + "client 10.0.0.1 connected",
+        ),
+        Case(
+            name="iso date",
+            family="real-world",
+            pattern=f"{_repeat(digit, 4)}-[01]{digit}-[0-3]{digit}",
+            matching="2024-05-01",
+            haystack=_noise(20_000, "abc -:0123") + "2024-05-01",
+        ),
+        Case(
+            name="log level",
+            family="real-world",
+            pattern=".*(ERROR|FATAL) .*",
+            matching="2024-05-01 12:00:00 ERROR disk full",
+            haystack=log * 400 + "2024-05-01 12:00:01 ERROR disk full\n",
+        ),
+        Case(
+            name="hex ids",
+            family="real-world",
+            pattern="[0-9a-f]+(-[0-9a-f]+)*",
+            matching="-".join(
+                _noise(n, "0123456789abcdef", seed=n) for n in (8, 4) * 500
+            ),
+            haystack=log * 400 + "id 3f2a-09bc",
+        ),
+        Case(
+            name="csv row",
+            family="real-world",
+            pattern="([a-z0-9 .]*,)*[a-z0-9 .]*",
+            matching=",".join(
+                _noise(40, "abcdefghij 0123456789.", seed=4) for _ in range(200)
+            ),
+            haystack=log * 400 + "a,b,c",
+        ),
+        Case(
+            name="url",
+            family="real-world",
+            pattern="https?://[a-z0-9.\\-]+(/[a-zA-Z0-9._~\\-]*)*(\\?[a-z0-9=&]*)?",
+            matching="https://example.com/a/b/c.html?x=1&y=2",
+            haystack=log * 400 + "see https://example.com/docs for more",
+        ),
+    ]
+
+
+CORPUS: List[Case] = _pathological() + _real_world()
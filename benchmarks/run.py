@@ -0,0 +1,123 @@
+"""Times every stage of the library over the corpus and writes the results as JSON.
+
+Run from the root of the repository:
+
+    python -m benchmarks.run --output results.json
+
+Parsing, NFA construction, determinization, minimization and compilation are
+timed separately, so a regression can be traced to its stage, and matching is
+timed next to the re module as a baseline. Every timing is the best and the
+median of a number of repeats, in seconds.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.corpus import CORPUS, Case
+from re_automata.finite_automata import LazyDFA
+from re_automata.finite_automata.automata import _nfa_step
+from re_automata.finite_automata.compiled import CompiledDFA
+from re_automata.finite_automata.determinize import _determinize, _minimize
+from re_automata.finite_automata.glushkov import _glushkov
+from re_automata.finite_automata.tables import _NFATables
+from re_automata.regex import from_string
+
+
+def _time(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"best": min(times), "median": statistics.median(times)}
+
+
+def _run_case(case: Case, repeat: int) -> Dict[str, object]:
+    timings: Dict[str, Dict[str, float]] = {}
+
+    timings["parse"] = _time(lambda: from_string(case.pattern), repeat)
+    ast = from_string(case.pattern)
+    timings["thompson"] = _time(lambda: _nfa_step(ast), repeat)
+    timings["glushkov"] = _time(lambda: _glushkov(ast), repeat)
+    nfa = _glushkov(ast)
+    timings["tables"] = _time(lambda: _NFATables(nfa), repeat)
+    tables = nfa.tables
+    timings["determinize"] = _time(lambda: _determinize(tables), repeat)
+    dfa = _determinize(tables)
+    timings["minimize"] = _time(lambda: _minimize(dfa), repeat)
+    minimal = _minimize(dfa)
+    timings["compile"] = _time(lambda: CompiledDFA._from_table(minimal), repeat)
+    compiled = CompiledDFA._from_table(minimal, pattern=case.pattern)
+
+    timings["fullmatch compiled"] = _time(
+        lambda: compiled.fullmatch(case.matching), repeat
+    )
+    generated = compiled.codegen()
+    timings["fullmatch codegen"] = _time(lambda: generated(case.matching), repeat)
+    timings["fullmatch nfa"] = _time(lambda: nfa.fullmatch(case.matching), repeat)
+    lazy = LazyDFA(nfa)
+    timings["search lazy"] = _time(lambda: lazy.search(case.haystack), repeat)
+
+    stdlib = re.compile(case.re_pattern or case.pattern, re.DOTALL)
+    timings["fullmatch re"] = _time(lambda: stdlib.fullmatch(case.matching), repeat)
+    timings["search re"] = _time(lambda: stdlib.search(case.haystack), repeat)
+
+    return {
+        "name": case.name,
+        "family": case.family,
+        "nfa_states": len(tables.states),
+        "dfa_states": dfa.nstates,
+        "minimal_states": compiled.nstates,
+        "classes": compiled.nclasses,
+        "timings": timings,
+    }
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", "-o", help="File to write to, stdout if left out")
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    parser.add_argument("--filter", "-k", help="Only run cases containing this")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in CORPUS if not args.filter or args.filter in case.name]
+    results = []
+    for case in cases:
+        print(f"{case.name}...", file=sys.stderr)
+        results.append(_run_case(case, args.repeat))
+    report = {
+        "revision": _revision(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "cases": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
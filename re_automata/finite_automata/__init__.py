@@ -1,12 +1,95 @@
+from typing import Callable
+
 from .automata import _nfa_step, Automata
+from .cache import CacheInfo, CompileCache
+from .compiled import CompiledDFA
+from .equivalence import Verdict, equivalent, includes
+from .glushkov import _glushkov
+from .lazy import LazyDFA
+from .prefilter import Prefilter
+from .product import LazyProduct
+from .parallel import parallel_count, parallel_fullmatch
+from .regex_set import RegexSet
+from .stream import StreamMatcher, match_stream
 from ..regex import from_string as regex_from_string
+from ..regex.simplify import simplify
+
+__all__ = [
+    "NFA_MODES",
+    "Automata",
+    "CacheInfo",
+    "CompileCache",
+    "CompiledDFA",
+    "LazyDFA",
+    "LazyProduct",
+    "Prefilter",
+    "RegexSet",
+    "StreamMatcher",
+    "Verdict",
+    "compile_cache",
+    "compiled_dfa_from_string",
+    "dfa_from_string",
+    "equivalent",
+    "includes",
+    "match_stream",
+    "matcher_from_string",
+    "nfa_from_string",
+    "parallel_count",
+    "parallel_fullmatch",
+]
+
+# Shared by all the *_from_string functions. The automata in it are shared between
+# callers and must not be modified.
+compile_cache = CompileCache()
+
+# The NFA constructions: "thompson" gives about two states per atom linked by
+# epsilon edges, "glushkov" exactly one state per atom plus one and no epsilon edges
+NFA_MODES = {
+    "thompson": _nfa_step,
+    "glushkov": _glushkov,
+}
 
 
 def dfa_from_string(regex: str) -> Automata:
-    nfa = nfa_from_string(regex)
-    return nfa.minimize()
+    return compile_cache.get(("dfa", regex), lambda: _build_dfa(regex))
+
+
+def nfa_from_string(regex: str, mode: str = "thompson") -> Automata:
+    if mode not in NFA_MODES:
+        raise ValueError(f'Unknown mode "{mode}", expected one of {list(NFA_MODES)}')
+    return compile_cache.get((mode, regex), lambda: _build_nfa(regex, mode))
+
+
+def compiled_dfa_from_string(regex: str, utf8: bool = False) -> CompiledDFA:
+    """The minimal DFA of the regex, reading UTF-8 bytes with utf8"""
+    return compile_cache.get(
+        ("compiled", utf8, regex), lambda: _build_compiled(regex, utf8)
+    )
+
+
+def matcher_from_string(regex: str, mode: str = "fullmatch") -> Callable[[str], object]:
+    """A generated Python function for the regex, see CompiledDFA.codegen"""
+    return compile_cache.get(
+        ("codegen", mode, regex), lambda: compiled_dfa_from_string(regex).codegen(mode)
+    )
+
+
+def _build_dfa(regex: str) -> Automata:
+    # The minimal DFA doesn't depend on the NFA, and the epsilon-free one is cheaper
+    # to determinize
+    nfa = nfa_from_string(regex, mode="glushkov")
+    dfa = nfa.minimize()
+    dfa.prefilter = nfa.prefilter
+    return dfa
+
+
+def _build_nfa(regex: str, mode: str) -> Automata:
+    re_ast = simplify(regex_from_string(regex))
+    nfa = NFA_MODES[mode](re_ast)
+    nfa.prefilter = Prefilter.from_regex(re_ast)
+    return nfa
 
 
-def nfa_from_string(regex: str) -> Automata:
-    re_ast = regex_from_string(regex)
-    return _nfa_step(re_ast)
+def _build_compiled(regex: str, utf8: bool) -> CompiledDFA:
+    nfa = nfa_from_string(regex, mode="glushkov")
+    return nfa.compile(pattern=regex, utf8=utf8)
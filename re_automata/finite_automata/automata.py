@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Set, Union, Tuple, List
+from typing import Dict, FrozenSet, Set, Union, Tuple, List, Optional, TYPE_CHECKING
 
 from re_automata.regex.AST import (
     Regex,
@@ -15,183 +15,109 @@ from re_automata.regex.AST import (
     NegSet,
     AstConstant,
     Range,
+    _children,
 )
+from re_automata.finite_automata.transition_map import TransitionMap
+from re_automata.stats import _traced
+
+if TYPE_CHECKING:
+    from re_automata.finite_automata.compiled import CompiledDFA
+    from re_automata.finite_automata.prefilter import Prefilter
+    from re_automata.finite_automata.product import LazyProduct
+    from re_automata.finite_automata.tables import _NFATables
 
 TransitionLabel = Union[Char, Range, AstConstant]
 
 
+def _automata_counts(nfa: Automata) -> Dict[str, int]:
+    return {
+        "states": len(nfa.states),
+        "transitions": sum(len(state.transitions) for state in nfa.states),
+    }
+
+
+# The start and accepting state of the NFA of a subexpression
+Fragment = Tuple["State", "State"]
+
+
+@_traced("thompson", _automata_counts)
 def _nfa_step(regex: Regex) -> Automata:
-    if isinstance(regex, (Char, AstConstant, PosSet, NegSet)):
-        s1 = State()
-        s2 = State()
-        s1.add_transition(regex, s2)
+    """Thompson construction of an NFA for the regex.
 
-        return Automata(
-            states={s1, s2},
-            start_state=s1,
-            accepting_state=s2,
-        )
-    if isinstance(regex, Or):
-        s1 = State()
-        left_nfa = _nfa_step(regex.left)
-        right_nfa = _nfa_step(regex.right)
-        s2 = State()
-
-        s1.add_transition(AstConstant.epsilon, left_nfa.start_state)
-        s1.add_transition(AstConstant.epsilon, right_nfa.start_state)
-        left_nfa.accepting_state.add_transition(AstConstant.epsilon, s2)
-        right_nfa.accepting_state.add_transition(AstConstant.epsilon, s2)
-
-        return Automata(
-            states={s1, s2, *left_nfa.states, *right_nfa.states},
-            start_state=s1,
-            accepting_state=s2,
-        )
-    if isinstance(regex, Concat):
-        left_nfa = _nfa_step(regex.left)
-        right_nfa = _nfa_step(regex.right)
-        left_nfa.accepting_state.add_transition(
-            AstConstant.epsilon, right_nfa.start_state
-        )
-        return Automata(
-            states=left_nfa.states | right_nfa.states,
-            start_state=left_nfa.start_state,
-            accepting_state=right_nfa.accepting_state,
-        )
-    if isinstance(regex, Kleene):
-        # Extra node is added so that there isn't an epsilon-loop
-        s = State()
-        inner_nfa = _nfa_step(regex.r)
-        s.add_transition(AstConstant.epsilon, inner_nfa.start_state)
-        s.add_transition(AstConstant.epsilon, inner_nfa.accepting_state)
-        inner_nfa.accepting_state.add_transition(
-            AstConstant.epsilon, inner_nfa.start_state
-        )
-        return Automata(
-            states=inner_nfa.states | {s},
-            start_state=s,
-            accepting_state=inner_nfa.accepting_state,
-        )
-    if isinstance(regex, Plus):
-        inner_nfa = _nfa_step(regex.r)
-        # Transition to redo inner
-        inner_nfa.accepting_state.add_transition(
-            AstConstant.epsilon, inner_nfa.start_state
-        )
-        return inner_nfa
-    if isinstance(regex, Maybe):
-        inner_nfa = _nfa_step(regex.r)
-        # Transition to skip inner
-        inner_nfa.start_state.add_transition(
-            AstConstant.epsilon, inner_nfa.accepting_state
-        )
-        return inner_nfa
-    if isinstance(regex, Group):
-        return _nfa_step(regex.r)
-    raise NotImplementedError()
-
-
-def _split_labels(
-    label1: TransitionLabel,
-    states1: Set[State],
-    label2: TransitionLabel,
-    states2: Set[State],
-) -> List[Tuple[TransitionLabel, Set[State]]]:
-    # Either two partially overlapping Ranges or one Range that contains the Char
-    if isinstance(label1, Range) and isinstance(label2, Range):
-        label1, states1, label2, states2 = (
-            (label1, states1, label2, states2)
-            if (label1.start.s, label1.end.s) <= (label2.start.s, label2.end.s)
-            else (label2, states2, label1, states1)
-        )
+    The AST is walked in post-order with an explicit stack rather than recursion,
+    so long patterns don't hit the recursion limit. Every state is added once to
+    one shared list, and subexpressions are only passed around as their start
+    and accepting state, so the construction is linear in the size of the regex.
+    """
+    states: List[State] = []
+    built: List[Fragment] = []
+    stack: List[Tuple[Regex, bool]] = [(regex, False)]
+    while stack:
+        node, children_built = stack.pop()
+        children = _children(node)
+        if children and not children_built:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        inner = built[len(built) - len(children) :]
+        del built[len(built) - len(children) :]
+        built.append(_nfa_combine(node, inner, states))
+    ((start, accepting),) = built
+    return Automata(states=set(states), start_state=start, accepting_states={accepting})
 
-        if label1.start == label2.start:
-            assert label1.end.s < label2.end.s
-            # ex: l1 = [a-f], l2 = [a-z]
-            return [
-                (label1, states1 | states2),
-                (Range(Char(chr(ord(label1.end.s) + 1)), label2.end), states2),
-            ]
-        assert label1.start.s < label2.start.s
-        if label1.end.s < label2.end.s:
-            # ex: l1 = [a-d], l2 = [c-f]
-            return [
-                (Range(label1.start, Char(chr(ord(label2.start.s) - 1))), states1),
-                (Range(label2.start, label1.end), states1 | states2),
-                (Range(Char(chr(ord(label1.end.s) + 1)), label2.end), states2),
-            ]
-        if label1.end == label2.end:
-            # ex: l1 = [a-z], l2 = [x-z]
-            return [
-                (Range(label1.start, Char(chr(ord(label2.start.s) - 1))), states1),
-                (label2, states1 | states2),
-            ]
-        assert label1.end.s > label2.end.s
-        # ex: l1 = [a-f], l2 = [c-d]
-        return [
-            (Range(label1.start, Char(chr(ord(label2.start.s) - 1))), states1),
-            (label2, states1 | states2),
-            (Range(Char(chr(ord(label2.end.s) + 1)), label1.end), states2),
-        ]
-
-    if isinstance(label1, Char):
-        char_label = label1
-        char_states = states1
-    elif isinstance(label2, Char):
-        char_label = label2
-        char_states = states2
-    else:
-        assert False, "Bad logic"
-    if isinstance(label1, Range):
-        range_label = label1
-        range_states = states1
-    elif isinstance(label2, Range):
-        range_label = label2
-        range_states = states2
-    else:
-        assert False, "Bad logic"
 
-    assert range_label.start.s <= char_label.s <= range_label.end.s
+def _nfa_combine(regex: Regex, inner: List[Fragment], states: List[State]) -> Fragment:
+    """Builds the fragment of regex from the already built fragments of its
+    children, adding its new states to states
+    """
+    if isinstance(regex, Group):
+        (fragment,) = inner
+        return fragment
+    if isinstance(regex, Concat):
+        for (_, left_accepting), (right_start, _) in zip(inner, inner[1:]):
+            left_accepting.add_transition(AstConstant.epsilon, right_start)
+        return inner[0][0], inner[-1][1]
+    if not isinstance(
+        regex, (Char, AstConstant, PosSet, NegSet, Or, Kleene, Plus, Maybe)
+    ):
+        raise NotImplementedError()
 
-    labels: List[Tuple[TransitionLabel, Set[State]]] = []
-    if range_label.start != char_label:
-        labels.append(
-            (Range(range_label.start, Char(chr(ord(char_label.s) - 1))), range_states)
-        )
-    labels.append((char_label, char_states | range_states))
-    if range_label.end != char_label:
-        labels.append(
-            (Range(Char(chr(ord(char_label.s) + 1)), range_label.end), range_states)
-        )
-    return labels
+    s1 = State()
+    s2 = State()
+    states += (s1, s2)
+    if isinstance(regex, (Char, AstConstant, PosSet, NegSet)):
+        s1.add_transition(regex, s2)
+    elif isinstance(regex, Or):
+        for start, accepting in inner:
+            s1.add_transition(AstConstant.epsilon, start)
+            accepting.add_transition(AstConstant.epsilon, s2)
+    else:
+        # New start and accepting states keep the loop and the skip of this
+        # fragment from reaching into the fragments around it
+        ((start, accepting),) = inner
+        s1.add_transition(AstConstant.epsilon, start)
+        accepting.add_transition(AstConstant.epsilon, s2)
+        if not isinstance(regex, Maybe):
+            # Transition to redo inner
+            accepting.add_transition(AstConstant.epsilon, start)
+        if not isinstance(regex, Plus):
+            # Transition to skip inner
+            s1.add_transition(AstConstant.epsilon, s2)
+    return s1, s2
 
 
 class State:
     def __init__(self):
-        from re_automata.finite_automata.transition_tree import TranistionTree
-
-        self.transitions = TranistionTree()
+        self.transitions = TransitionMap()
 
     def add_transition(
         self, label: Union[TransitionLabel, PosSet, NegSet], target_state: State
     ):
-        if isinstance(label, PosSet):
-            for sublabel in label.items:
-                self.add_transition(sublabel, target_state)
+        if isinstance(label, (PosSet, NegSet)):
+            self.transitions.add_ranges(label.ranges, {target_state})
             return
-        if isinstance(label, NegSet):
-            raise NotImplementedError()  # TODO: ????
-        from re_automata.finite_automata.transition_tree import LabelCollisionError
-
-        try:
-            self.transitions.add(label, {target_state})
-        except LabelCollisionError as e:
-            pairs = _split_labels(label, {target_state}, e.label, e.states)
-            self.transitions.remove(e.label)
-            for l, states in pairs:
-                self.transitions.add(l, states)
-
-            pass  # TODO: split the collision
+        # Overlapping labels are split by the map itself
+        self.transitions.add(label, {target_state})
 
 
 class Automata:
@@ -199,12 +125,167 @@ class Automata:
         self,
         states: Set[State],
         start_state: State,
-        accepting_state: State,
+        accepting_states: Set[State],
+        tags: Optional[Dict[State, FrozenSet[int]]] = None,
     ):
+        """tags optionally maps the accepting states to the ids of the patterns they
+        accept, for automata matching several patterns at once like a RegexSet.
+        """
         self.states = states
         self.start_state = start_state
-        self.accepting_state = accepting_state
+        self.accepting_states = accepting_states
+        self.tags = tags
+        # Set by the *_from_string functions from the literals every match contains
+        self.prefilter: Optional[Prefilter] = None
+        self._tables: Optional[_NFATables] = None
+
+    @property
+    def accepting_state(self) -> State:
+        """The accepting state of an automata with exactly one, like the ones built
+        by _nfa_step.
+        """
+        if len(self.accepting_states) != 1:
+            n = len(self.accepting_states)
+            raise ValueError(f"Automata has {n} accepting states, expected 1")
+        (state,) = self.accepting_states
+        return state
+
+    def minimize(self) -> Automata:
+        """Returns the minimal DFA accepting the same language as this automata.
+
+        The automata is first determinized with a subset construction over the
+        disjoint intervals of its labels, and then minimized with Hopcroft's
+        partition refinement.
+        """
+        from re_automata.finite_automata.determinize import (
+            _determinize,
+            _minimize,
+            _to_automata,
+        )
+
+        return _to_automata(_minimize(_determinize(self.tables)))
+
+    def remove_epsilons(self) -> Automata:
+        """Returns an equivalent automata without epsilon edges or useless states"""
+        from re_automata.finite_automata.epsilon import _remove_epsilons
+
+        return _remove_epsilons(self.tables)
+
+    def intersect(self, other: Automata) -> LazyProduct:
+        """The product of the strings matched by both automata.
+
+        Its states are only built as it's matched against or checked for
+        emptiness, use to_automata on it for the DFA of the whole product.
+        """
+        from re_automata.finite_automata.product import LazyProduct, _Product, _both
+
+        return LazyProduct(_Product([self.tables, other.tables], _both))
+
+    def difference(self, other: Automata) -> LazyProduct:
+        """The product of the strings matched by this automata but not by other,
+        explored on demand like for intersect
+        """
+        from re_automata.finite_automata.product import (
+            LazyProduct,
+            _Product,
+            _first_only,
+        )
+
+        return LazyProduct(_Product([self.tables, other.tables], _first_only))
+
+    def complement(self) -> LazyProduct:
+        """The subset automata of the strings not matched by this automata,
+        explored on demand like for intersect
+        """
+        from re_automata.finite_automata.product import LazyProduct, _Product, _none
+
+        return LazyProduct(_Product([self.tables], _none))
+
+    def is_empty(self) -> bool:
+        """Whether no string is matched"""
+        return self.example() is None
+
+    def is_disjoint(self, other: Automata) -> bool:
+        """Whether no string is matched by both automata.
+
+        The product is only explored until a common string is found.
+        """
+        return self.common_example(other) is None
+
+    def is_subset(self, other: Automata) -> bool:
+        """Whether every string matched by this automata is matched by other.
+
+        The difference is only explored until a string matched by this automata
+        alone is found.
+        """
+        return self.difference(other).is_empty()
+
+    def example(self) -> Optional[str]:
+        """A shortest string that is matched, or None if there is none"""
+        from re_automata.finite_automata.product import _Product
+
+        return _Product([self.tables], any).shortest_accepted()
+
+    def common_example(self, other: Automata) -> Optional[str]:
+        """A shortest string matched by both automata, or None if there is none"""
+        from re_automata.finite_automata.product import _Product, _both
+
+        return _Product([self.tables, other.tables], _both).shortest_accepted()
+
+    def compile(self, pattern: Optional[str] = None, utf8: bool = False) -> CompiledDFA:
+        """Returns the minimal DFA of this automata as a table driven CompiledDFA.
+
+        pattern is only kept as a description of where the automata came from.
+        With utf8 the DFA reads the UTF-8 encoding of the text one byte at a time,
+        so it runs directly over bytes and mmaps without decoding them. Invalid
+        UTF-8 never matches.
+        """
+        from re_automata.finite_automata.compiled import CompiledDFA
+        from re_automata.finite_automata.determinize import _determinize, _minimize
+
+        tables = self.tables
+        if utf8:
+            from re_automata.finite_automata.utf8 import _to_utf8
+
+            tables = _to_utf8(tables).tables
+        dfa = _minimize(_determinize(tables))
+        return CompiledDFA._from_table(dfa, pattern=pattern, utf8=utf8)
+
+    @property
+    def tables(self) -> _NFATables:
+        """The numbered, table based view of this automata used for matching.
+
+        It's built on first use, so the automata shouldn't be changed after that.
+        """
+        if self._tables is None:
+            from re_automata.finite_automata.tables import _build_tables
+
+            self._tables = _build_tables(self)
+        return self._tables
+
+    def fullmatch(self, text: str) -> bool:
+        """Whether the whole text is matched"""
+        from re_automata.finite_automata.simulation import _fullmatch
+
+        return _fullmatch(self.tables, text)
+
+    def match(self, text: str) -> Optional[Tuple[int, int]]:
+        """The span of the longest match at the start of text, or None"""
+        from re_automata.finite_automata.simulation import _match
+
+        end = _match(self.tables, text)
+        return None if end is None else (0, end)
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """The span of the leftmost-longest match anywhere in text, or None.
+
+        With a prefilter, text without the required literals is rejected up front
+        and matches are only looked for where a required prefix is found.
+        """
+        from re_automata.finite_automata.simulation import _search
 
-    def minimize(self):
-        # TODO
-        pass
+        if self.prefilter is None:
+            return _search(self.tables, text)
+        if self.prefilter.rejects(text):
+            return None
+        return _search(self.tables, text, self.prefilter.starts(text))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence
+
+from re_automata.finite_automata.determinize import DEAD
+
+if TYPE_CHECKING:
+    import numpy  # type: ignore[import-not-found]
+
+    from re_automata.finite_automata.compiled import CompiledDFA
+
+
+# Below this many strings still being read, the rest are finished one at a time,
+# which costs less than a NumPy call per position
+MIN_LOCKSTEP = 16
+
+
+def _match_many(dfa: CompiledDFA, strings: Sequence[str]) -> numpy.ndarray:
+    """Fullmatches every string, running the DFA on all of them in lockstep.
+
+    The character classes of all strings are kept in one flat array, so memory
+    is proportional to their total length, and the states are advanced a
+    position at a time with a gather from the transition table. The strings are
+    ordered by length, longest first, so the ones still being read are always
+    the first ones. Once only a few are left, like the tail of a single long
+    string, they are finished with a plain loop.
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError(
+            "match_many requires NumPy, install it with re-automata[numpy]"
+        ) from e
+
+    if dfa.utf8:
+        # A position per byte, as the DFA reads them
+        encoded = [string.encode("utf-8", "surrogatepass") for string in strings]
+        sizes = map(len, encoded)
+        code_points = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    else:
+        sizes = map(len, strings)
+        # Lone surrogates are code points like any other, as fullmatch reads them
+        code_points = np.frombuffer(
+            "".join(strings).encode("utf-32-le", "surrogatepass"), dtype="<u4"
+        )
+    m = len(strings)
+    lengths = np.fromiter(sizes, dtype=np.intp, count=m)
+    # Where each string starts in the flat array, which keeps the input order
+    starts = np.zeros(m, dtype=np.intp)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    order = np.argsort(-lengths, kind="stable")
+    lengths = lengths[order]
+    starts = starts[order]
+
+    # The smallest index type that fits the table, since the loop below is
+    # bound by memory traffic
+    n, k = dfa.nstates, dfa.nclasses
+    index = np.dtype(np.int32 if (n + 1) * k < 2**31 else np.intp)
+    latin1 = np.asarray(dfa._latin1, dtype=index)
+    if not len(code_points) or code_points.max() < 256:
+        classes = latin1[code_points]
+    else:
+        classes = np.asarray(dfa.range_classes, dtype=index)[
+            np.searchsorted(np.asarray(dfa.boundaries), code_points, side="right") - 1
+        ]
+
+    # DEAD becomes an extra state that never leaves or accepts. The states are
+    # kept premultiplied by k, to gather from the flat table with one addition.
+    table = np.full((n + 1) * k, n, dtype=index)
+    table[: n * k] = dfa.table
+    table[table == DEAD] = n
+    table *= k
+    accepting_at_end = np.zeros(n + 1, dtype=bool)
+    accepting_at_end[:n] = np.frombuffer(bytes(dfa.accepting_at_end), dtype=np.uint8)
+
+    states = np.full(m, dfa.start * k, dtype=index)
+    gathered = np.empty(m, dtype=index)
+    width = int(lengths[0]) if m else 0
+    # Number of strings longer than each position
+    active = np.searchsorted(-lengths, -np.arange(width), side="left")
+    # Position of the next character of every string in the flat array
+    positions = starts.copy()
+    i = 0
+    while i < width and active[i] >= MIN_LOCKSTEP:
+        rows = active[i]
+        current, step = states[:rows], gathered[:rows]
+        np.take(classes, positions[:rows], out=step)
+        step += current
+        np.take(table, step, out=current)
+        positions[:rows] += 1
+        i += 1
+    if i < width:
+        table_list = table.tolist()
+        dead = n * k
+        for row in range(int(active[i])):
+            state = int(states[row])
+            end = int(starts[row] + lengths[row])
+            for cls in classes[int(positions[row]) : end].tolist():
+                state = table_list[state + cls]
+                if state == dead:
+                    break
+            states[row] = state
+
+    result = np.empty(m, dtype=bool)
+    result[order] = accepting_at_end[states // k]
+    return result
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable, NamedTuple, TypeVar
+
+from re_automata.stats import current_stats
+
+T = TypeVar("T")
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class CompileCache:
+    """A thread safe LRU cache of compiled automata.
+
+    Values are built outside of the lock, so two threads missing on the same key
+    at once may both build it, but only the first one to finish is kept.
+    A maxsize of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        if maxsize < 0:
+            raise ValueError("maxsize can't be negative")
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize: int):
+        if maxsize < 0:
+            raise ValueError("maxsize can't be negative")
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def get(self, key: Hashable, build: Callable[[], T]) -> T:
+        """The cached value for key, calling build to create it on a miss"""
+        stats = current_stats()
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                if stats is not None:
+                    stats.count("cache", hits=1)
+                return self._entries[key]  # type: ignore
+            self.misses += 1
+        if stats is not None:
+            stats.count("cache", misses=1)
+
+        value = build()
+        with self._lock:
+            if self._maxsize == 0:
+                return value
+            if key in self._entries:
+                return self._entries[key]  # type: ignore
+            self._entries[key] = value
+            self._evict()
+        return value
+
+    def _evict(self):
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                maxsize=self._maxsize,
+                currsize=len(self._entries),
+            )
+
+    def purge(self):
+        """Drops every cached value and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+from re_automata.finite_automata.determinize import DEAD
+from re_automata.regex.AST import MAX_CODE_POINT
+
+if TYPE_CHECKING:
+    from re_automata.finite_automata.compiled import CompiledDFA
+
+MODES = ("fullmatch", "match")
+
+# Blocks are nested at most this deep, deeper states are dispatched to instead
+MAX_NESTING = 24
+# Transitions on more characters than this are tested with comparisons
+MAX_SET_SIZE = 64
+
+
+def _codegen(dfa: CompiledDFA, mode: str) -> Callable[[str], object]:
+    """Compiles the Python function generated for dfa by _source"""
+    if mode not in MODES:
+        raise ValueError(f'Unknown mode "{mode}", expected one of {list(MODES)}')
+    source = _source(dfa, mode)
+    namespace: Dict[str, object] = {}
+    exec(compile(source, f"<dfa {dfa.pattern!r}>", "exec"), namespace)
+    function = namespace[mode]
+    function.__source__ = source  # type: ignore
+    return function  # type: ignore
+
+
+def _source(dfa: CompiledDFA, mode: str) -> str:
+    """Python source of a function running dfa on a str.
+
+    Every state is a block of straight-line code. A state looping on some
+    ranges consumes all of them with one precompiled regex scan, and a chain of
+    states that each only continue on one character is checked with a single
+    startswith. A transition continues directly into the block of its target
+    when nothing else leads there, so only the states with several ways in,
+    like the heads of loops, are dispatched to from the top of the main loop,
+    through a binary search on the state number. "fullmatch" returns whether the
+    whole text matches, "match" the end of the longest match at the start of
+    the text or None.
+
+    The text is first converted like CompiledDFA._coerce. A DFA reading UTF-8
+    gets its bytes as the characters of a Latin-1 str, so its byte ranges are
+    compared the same way.
+    """
+    return _Generator(dfa, mode).source()
+
+
+class _Generator:
+    """Writes the source of _source, one state block at a time"""
+
+    def __init__(self, dfa: CompiledDFA, mode: str):
+        self.dfa = dfa
+        self.mode = mode
+        self.fullmatch = mode == "fullmatch"
+        self.fail = "return False" if self.fullmatch else "return last"
+        self.runs = {s: _literal_run(dfa, s) for s in range(dfa.nstates)}
+        self.edges = {s: _edges(dfa, s) for s in _reachable(dfa, self.runs)}
+        # The module level definitions the function uses, like the loop scans
+        self.definitions: List[str] = []
+
+        incoming: Dict[int, int] = {}
+        for s in self.edges:
+            for target in self._targets(s):
+                incoming[target] = incoming.get(target, 0) + 1
+        # The states entered from the top of the main loop, the others are
+        # written inside the block of the only state leading to them
+        self.dispatched = [
+            s for s in self.edges if s == dfa.start or incoming.get(s, 0) != 1
+        ]
+        # Blocks nested too deep are dispatched to as well
+        depths = {s: 0 for s in self.dispatched}
+        order = list(self.dispatched)
+        for s in order:
+            for target in self._targets(s):
+                if target in depths:
+                    continue
+                depths[target] = depths[s] + 1
+                if depths[target] > MAX_NESTING:
+                    depths[target] = 0
+                    self.dispatched.append(target)
+                order.append(target)
+        self.dispatched_set = set(self.dispatched)
+
+    def _targets(self, s: int) -> List[int]:
+        """The states s continues into, without its consumed self loop"""
+        literal, run_target = self.runs[s]
+        if literal:
+            return [run_target]
+        return list(dict.fromkeys(t for _, _, t in self.edges[s] if t != s))
+
+    def source(self) -> str:
+        lines = [f"def {self.mode}(text):"]
+        if self.dfa.utf8:
+            lines += [
+                "    if isinstance(text, str):",
+                "        text = text.encode('utf-8', 'surrogatepass')",
+                "    text = str(text, 'latin-1')",
+            ]
+        else:
+            lines += [
+                "    if not isinstance(text, str):",
+                "        text = str(text, 'utf-8')",
+            ]
+        lines += ["    n = len(text)", "    i = 0"]
+        if not self.fullmatch:
+            lines.append("    last = None")
+        if len(self.dispatched) > 1:
+            lines.append(f"    state = {self.dfa.start}")
+        lines.append("    while True:")
+        blocks = {s: self._block(s) for s in self.dispatched}
+        lines.extend(
+            f"        {line}" for line in self._dispatch(sorted(blocks), blocks)
+        )
+        if any(line.startswith("_loop") for line in self.definitions):
+            self.definitions.insert(0, "import re as _re")
+        return "\n".join([*self.definitions, *lines]) + "\n"
+
+    def _dispatch(self, states: List[int], blocks: Dict[int, List[str]]) -> List[str]:
+        """Branches to the block of the current state by bisecting states"""
+        if len(states) == 1:
+            return blocks[states[0]]
+        middle = len(states) // 2
+        return [
+            f"if state < {states[middle]}:",
+            *(f"    {line}" for line in self._dispatch(states[:middle], blocks)),
+            "else:",
+            *(f"    {line}" for line in self._dispatch(states[middle:], blocks)),
+        ]
+
+    def _goto(self, target: int) -> List[str]:
+        """Continues into the block of target"""
+        if target not in self.dispatched_set:
+            return self._block(target)
+        if len(self.dispatched) == 1:
+            return ["continue"]
+        return [f"state = {target}", "continue"]
+
+    def _block(self, s: int) -> List[str]:
+        """The straight-line code of state s, ending in a return or continue"""
+        dfa = self.dfa
+        accepting = not self.fullmatch and dfa.accepting[s]
+        body: List[str] = []
+        if accepting:
+            body.append("last = i")
+        loop = [(lo, hi) for lo, hi, target in self.edges[s] if target == s]
+        if loop:
+            name = f"_loop{s}"
+            self.definitions.append(
+                f"{name} = _re.compile({_char_class(loop) + '*'!r}).match"
+            )
+            # Most runs are short, so the scan is only started on a first match
+            body.append(f"if i < n and ({self._condition(s, s, loop, 'text[i]')}):")
+            body.append(f"    i = {name}(text, i + 1).end()")
+            if accepting:
+                body.append("last = i")
+
+        literal, run_target = self.runs[s]
+        if dfa.accepting_at_end[s]:
+            body.append(f"if i == n: return {'True' if self.fullmatch else 'n'}")
+        elif not literal:
+            # startswith fails at the end of the text by itself
+            body.append(f"if i == n: {self.fail}")
+        if literal:
+            body.append(f"if text.startswith({literal!r}, i):")
+            body.append(f"    i += {len(literal)}")
+            body.extend(f"    {line}" for line in self._goto(run_target))
+        else:
+            by_target: Dict[int, List[Tuple[int, int]]] = {}
+            for lo, hi, target in self.edges[s]:
+                if target != s:
+                    by_target.setdefault(target, []).append((lo, hi))
+            if by_target:
+                body.append("c = text[i]")
+                body.append("i += 1")
+            for target, ranges in by_target.items():
+                body.append(f"if {self._condition(s, target, ranges)}:")
+                body.extend(f"    {line}" for line in self._goto(target))
+        body.append(self.fail)
+        return body
+
+    def _condition(
+        self, s: int, target: int, ranges: List[Tuple[int, int]], c: str = "c"
+    ) -> str:
+        """The test of the character c for the transition of s to target, with a
+        set for more than a couple of ranges holding few characters
+        """
+        size = sum(hi - lo + 1 for lo, hi in ranges)
+        if len(ranges) <= 2 or size > MAX_SET_SIZE:
+            return _condition(c, ranges)
+        name = f"_set{s}_{target}"
+        chars = "".join(chr(cp) for lo, hi in ranges for cp in range(lo, hi + 1))
+        self.definitions.append(f"{name} = frozenset({chars!r})")
+        return f"{c} in {name}"
+
+
+def _reachable(dfa: CompiledDFA, runs: Dict[int, Tuple[str, int]]) -> List[int]:
+    """The states that are branched to, breadth first from the start.
+
+    States inside a literal run are skipped over by startswith, so they're
+    only reachable if something else leads to them.
+    """
+    order = [dfa.start]
+    seen = {dfa.start}
+    i = 0
+    while i < len(order):
+        s = order[i]
+        i += 1
+        literal, run_target = runs[s]
+        targets = [run_target] if literal else [t for _, _, t in _edges(dfa, s)]
+        for target in targets:
+            if target not in seen:
+                seen.add(target)
+                order.append(target)
+    return order
+
+
+def _edges(dfa: CompiledDFA, s: int) -> List[Tuple[int, int, int]]:
+    """The (lo, hi, target) of the transitions of state s to live states, with
+    adjacent ranges to the same target merged
+    """
+    edges: List[Tuple[int, int, int]] = []
+    k = dfa.nclasses
+    bounds = [*dfa.boundaries, MAX_CODE_POINT + 1]
+    for i, lo in enumerate(dfa.boundaries):
+        hi = bounds[i + 1] - 1
+        target = dfa.table[s * k + dfa.range_classes[i]]
+        if target == DEAD:
+            continue
+        if edges and edges[-1][2] == target and edges[-1][1] + 1 == lo:
+            edges[-1] = (edges[-1][0], hi, target)
+        else:
+            edges.append((lo, hi, target))
+    return edges
+
+
+def _literal_run(dfa: CompiledDFA, s: int) -> Tuple[str, int]:
+    """The characters that must follow in state s, and the state they lead to.
+
+    The run goes on while the states passed only continue on a single character
+    and don't accept, so that failing the run at any point fails the match. Runs
+    of a single character are left to the ordinary comparisons and returned
+    empty.
+    """
+    literal: List[str] = []
+    seen = {s}
+    state = s
+    while True:
+        edges = _edges(dfa, state)
+        if state == s:
+            # The inner loop of s has already consumed its self loop
+            edges = [edge for edge in edges if edge[2] != s]
+        if len(edges) != 1 or edges[0][0] != edges[0][1]:
+            break
+        lo, _, target = edges[0]
+        literal.append(chr(lo))
+        state = target
+        if state in seen or dfa.accepting_at_end[state]:
+            break
+        seen.add(state)
+    if len(literal) < 2:
+        return "", s
+    return "".join(literal), state
+
+
+def _condition(c: str, ranges: List[Tuple[int, int]]) -> str:
+    tests = []
+    for lo, hi in ranges:
+        if lo == hi:
+            tests.append(f"{c} == {chr(lo)!r}")
+        elif lo == 0:
+            tests.append(f"{c} <= {chr(hi)!r}")
+        elif hi == MAX_CODE_POINT:
+            tests.append(f"{c} >= {chr(lo)!r}")
+        else:
+            tests.append(f"{chr(lo)!r} <= {c} <= {chr(hi)!r}")
+    return " or ".join(tests)
+
+
+def _char_class(ranges: List[Tuple[int, int]]) -> str:
+    """A regex character class of ranges, with every code point escaped"""
+
+    def escape(cp: int) -> str:
+        if cp < 0x100:
+            return f"\\x{cp:02x}"
+        if cp < 0x10000:
+            return f"\\u{cp:04x}"
+        return f"\\U{cp:08x}"
+
+    return (
+        "["
+        + "".join(
+            escape(lo) if lo == hi else f"{escape(lo)}-{escape(hi)}"
+            for lo, hi in ranges
+        )
+        + "]"
+    )
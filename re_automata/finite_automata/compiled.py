@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from re_automata.finite_automata.determinize import DEAD, _DFATable
+from re_automata.stats import _traced
+
+if TYPE_CHECKING:
+    import numpy  # type: ignore[import-not-found]
+
+    from re_automata.finite_automata.serialize import PathLike
+
+
+class CompiledDFA:
+    """A frozen, table driven DFA.
+
+    States are numbered 0 to nstates - 1 and the alphabet is reduced to nclasses
+    equivalence classes of characters that every state treats the same. The code
+    points are split into ranges, range i covering boundaries[i] up to
+    boundaries[i + 1] - 1 and belonging to the class range_classes[i]. All
+    transitions are kept in one flat table where table[state * nclasses + cls] is
+    the next state, or DEAD if the input can no longer match. The class of code
+    points below 256 is looked up directly, other code points are found by
+    bisecting the boundaries.
+
+    A DFA for several patterns, like the one of a RegexSet, also has the ids of
+    the patterns accepted by every state. They're stored as indices into
+    tag_sets, in state_tags and state_tags_at_end.
+
+    A DFA compiled with utf8 reads the UTF-8 encoding of the text, one byte at a
+    time, and every other DFA reads code points. Text of the other kind is
+    encoded or decoded to what the DFA reads, see _coerce.
+
+    The arrays are arrays when the DFA is built, and memoryviews of the file when
+    it's loaded.
+    """
+
+    __slots__ = (
+        "boundaries",
+        "range_classes",
+        "nclasses",
+        "start",
+        "table",
+        "accepting",
+        "accepting_at_end",
+        "pattern",
+        "tag_sets",
+        "state_tags",
+        "state_tags_at_end",
+        "utf8",
+        "_latin1",
+    )
+
+    def __init__(
+        self,
+        boundaries: Sequence[int],
+        range_classes: Sequence[int],
+        nclasses: int,
+        start: int,
+        table: Sequence[int],
+        accepting: Sequence[int],
+        accepting_at_end: Sequence[int],
+        pattern: Optional[str] = None,
+        tag_sets: Optional[Sequence[FrozenSet[int]]] = None,
+        state_tags: Optional[Sequence[int]] = None,
+        state_tags_at_end: Optional[Sequence[int]] = None,
+        utf8: bool = False,
+    ):
+        self.boundaries = boundaries
+        self.range_classes = range_classes
+        self.nclasses = nclasses
+        self.start = start
+        self.table = table
+        self.accepting = accepting
+        self.accepting_at_end = accepting_at_end
+        self.pattern = pattern
+        self.tag_sets = tag_sets
+        self.state_tags = state_tags
+        self.state_tags_at_end = state_tags_at_end
+        self.utf8 = utf8
+        self._latin1 = array(
+            "i",
+            (range_classes[bisect_right(boundaries, cp) - 1] for cp in range(256)),
+        )
+
+    @classmethod
+    @_traced("compile", lambda dfa: {"states": dfa.nstates, "classes": dfa.nclasses})
+    def _from_table(
+        cls, dfa: _DFATable, pattern: Optional[str] = None, utf8: bool = False
+    ) -> CompiledDFA:
+        """Merges the classes of dfa that have identical transitions in every state"""
+        k, n = dfa.nclasses, dfa.nstates
+        columns: Dict[Tuple[int, ...], int] = {}
+        boundaries = array("i")
+        range_classes = array("i")
+        for c in range(k):
+            column = tuple(dfa.table[s * k + c] for s in range(n))
+            merged = columns.setdefault(column, len(columns))
+            if range_classes and range_classes[-1] == merged:
+                # Same class as the previous range, extend it instead
+                continue
+            boundaries.append(dfa.boundaries[c])
+            range_classes.append(merged)
+
+        table = array("i", [DEAD]) * (n * len(columns))
+        for column, merged in columns.items():
+            for s, target in enumerate(column):
+                table[s * len(columns) + merged] = target
+
+        tag_sets: Optional[List[FrozenSet[int]]] = None
+        state_tags = state_tags_at_end = None
+        if dfa.tags is not None and dfa.tags_at_end is not None:
+            # The empty set is always tag set 0
+            tag_ids: Dict[FrozenSet[int], int] = {frozenset(): 0}
+            for tags in (*dfa.tags, *dfa.tags_at_end):
+                tag_ids.setdefault(tags, len(tag_ids))
+            tag_sets = list(tag_ids)
+            state_tags = array("i", (tag_ids[tags] for tags in dfa.tags))
+            state_tags_at_end = array("i", (tag_ids[tags] for tags in dfa.tags_at_end))
+
+        return cls(
+            boundaries=boundaries,
+            range_classes=range_classes,
+            nclasses=len(columns),
+            start=dfa.start,
+            table=table,
+            accepting=bytes(dfa.accepting),
+            accepting_at_end=bytes(dfa.accepting_at_end),
+            pattern=pattern,
+            tag_sets=tag_sets,
+            state_tags=state_tags,
+            state_tags_at_end=state_tags_at_end,
+            utf8=utf8,
+        )
+
+    def save(self, path: PathLike):
+        """Writes the DFA to path in a binary format that load maps without parsing.
+
+        The file starts with a versioned header holding the sizes, whether the DFA
+        reads UTF-8 and a checksum, followed by the class map, the transition
+        table, the accept tags and the pattern the DFA was compiled from.
+        """
+        from re_automata.finite_automata.serialize import _save
+
+        _save(self, path)
+
+    @classmethod
+    def load(
+        cls, path: PathLike, pattern: Optional[str] = None, verify: bool = True
+    ) -> CompiledDFA:
+        """Loads a DFA written by save, using the mapped file directly.
+
+        If pattern is given, a DFA compiled from another pattern is rejected. A
+        ValueError is raised if the file isn't a DFA of this version, or if verify
+        is set and the checksum doesn't match.
+        """
+        from re_automata.finite_automata.serialize import _load
+
+        return _load(path, pattern=pattern, verify=verify)
+
+    def match_many(self, strings: Sequence[str]) -> numpy.ndarray:
+        """A boolean array of whether each string is fully matched.
+
+        Vectorized with NumPy, which is an optional dependency. The strings are
+        encoded first if the DFA reads UTF-8.
+        """
+        from re_automata.finite_automata.batch import _match_many
+
+        return _match_many(self, strings)
+
+    def codegen(self, mode: str = "fullmatch") -> Callable[[str], object]:
+        """Generates and compiles a Python function specialized to this DFA.
+
+        With mode "fullmatch" it returns whether the whole text matches, and with
+        "match" the end of the longest match at the start of the text, or None.
+        The generated source is kept in the function's __source__. The function
+        converts its input like _coerce, and the end of a match of a DFA reading
+        UTF-8 is a byte offset.
+        """
+        from re_automata.finite_automata.codegen import _codegen
+
+        return _codegen(self, mode)
+
+    def __reduce__(self):
+        # A loaded DFA is backed by memoryviews, which can't be pickled
+        def ints(values: Optional[Sequence[int]]) -> Optional[array]:
+            return None if values is None else array("i", values)
+
+        return self.__class__, (
+            ints(self.boundaries),
+            ints(self.range_classes),
+            self.nclasses,
+            self.start,
+            ints(self.table),
+            bytes(self.accepting),
+            bytes(self.accepting_at_end),
+            self.pattern,
+            self.tag_sets,
+            ints(self.state_tags),
+            ints(self.state_tags_at_end),
+            self.utf8,
+        )
+
+    @property
+    def nstates(self) -> int:
+        return len(self.accepting)
+
+    def class_of(self, code_point: int) -> int:
+        if code_point < 256:
+            return self._latin1[code_point]
+        return self.range_classes[bisect_right(self.boundaries, code_point) - 1]
+
+    def step(self, state: int, c: str) -> int:
+        """The state reached from state on the character c, or DEAD"""
+        return self.table[state * self.nclasses + self.class_of(ord(c))]
+
+    def _coerce(
+        self, text: Union[str, bytes, bytearray, memoryview]
+    ) -> Union[str, bytes, bytearray, memoryview]:
+        """text as this DFA reads it: bytes-like with utf8, else str.
+
+        str is encoded to UTF-8 for a DFA reading UTF-8. bytes-like text given to
+        a DFA reading code points is decoded as UTF-8, raising UnicodeDecodeError
+        if it isn't valid.
+        """
+        if self.utf8:
+            if isinstance(text, str):
+                # Surrogates have no UTF-8 encoding, so they never match
+                return text.encode("utf-8", "surrogatepass")
+            return text
+        if not isinstance(text, str):
+            return str(text, "utf-8")
+        return text
+
+    def fullmatch(self, text: Union[str, bytes, bytearray, memoryview]) -> bool:
+        """Whether the whole text is matched.
+
+        A DFA compiled with utf8 reads bytes-like text, which includes mmap
+        objects, without copying it.
+        """
+        text = self._coerce(text)
+        if not isinstance(text, str):
+            return self._fullmatch_bytes(text)
+        table = self.table
+        boundaries = self.boundaries
+        range_classes = self.range_classes
+        latin1 = self._latin1
+        k = self.nclasses
+        state = self.start
+        for c in text:
+            cp = ord(c)
+            if cp < 256:
+                cls = latin1[cp]
+            else:
+                cls = range_classes[bisect_right(boundaries, cp) - 1]
+            state = table[state * k + cls]
+            if state == DEAD:
+                return False
+        return bool(self.accepting_at_end[state])
+
+    def _fullmatch_bytes(self, data: Union[bytes, bytearray, memoryview]) -> bool:
+        table = self.table
+        latin1 = self._latin1
+        k = self.nclasses
+        state = self.start
+        with memoryview(data) as view, view.cast("B") as octets:
+            for byte in octets:
+                state = table[state * k + latin1[byte]]
+                if state == DEAD:
+                    return False
+        return bool(self.accepting_at_end[state])
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(pattern={self.pattern!r}, "
+            f"nstates={self.nstates}, nclasses={self.nclasses}, utf8={self.utf8})"
+        )
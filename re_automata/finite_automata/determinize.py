@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, FrozenSet, Hashable, List, Optional, Set
+
+from re_automata.finite_automata.automata import Automata, State
+from re_automata.finite_automata.tables import _NFATables
+from re_automata.regex.AST import AstConstant, MAX_CODE_POINT
+from re_automata.stats import _traced, current_stats
+
+# Target of a transition that can never lead to an accepting state
+DEAD = -1
+
+
+class _DFATable:
+    """A DFA over character classes, stored as a flat transition table.
+
+    table[state * nclasses + c] is the state reached from state on class c, or DEAD.
+    A state in accepting accepts the input read so far, while a state in
+    accepting_at_end only does so if the input also ends there, which is what
+    end of string ("$") edges require. A DFA for several patterns also has the
+    ids of the patterns accepted by every state in tags and tags_at_end.
+    """
+
+    def __init__(
+        self,
+        boundaries: List[int],
+        start: int,
+        table: List[int],
+        accepting: List[bool],
+        accepting_at_end: List[bool],
+        tags: Optional[List[FrozenSet[int]]] = None,
+        tags_at_end: Optional[List[FrozenSet[int]]] = None,
+    ):
+        self.boundaries = boundaries
+        self.start = start
+        self.table = table
+        self.accepting = accepting
+        self.accepting_at_end = accepting_at_end
+        self.tags = tags
+        self.tags_at_end = tags_at_end
+
+    @property
+    def nclasses(self) -> int:
+        return len(self.boundaries)
+
+    @property
+    def nstates(self) -> int:
+        return len(self.accepting)
+
+
+@_traced("determinize", lambda dfa: {"states": dfa.nstates, "classes": dfa.nclasses})
+def _determinize(nfa: _NFATables) -> _DFATable:
+    """Subset construction over the character classes of the NFA.
+
+    The resulting DFA is complete, the empty set of NFA states is kept as an
+    ordinary state rather than as DEAD.
+    """
+    k = nfa.nclasses
+    masks = [nfa.start_mask]
+    ids = {nfa.start_mask: 0}
+    table: List[int] = []
+    i = 0
+    while i < len(masks):
+        mask = masks[i]
+        i += 1
+        for c in range(k):
+            target = nfa.step(mask, c) if mask else 0
+            if target not in ids:
+                ids[target] = len(masks)
+                masks.append(target)
+            table.append(ids[target])
+
+    stats = current_stats()
+    if stats is not None:
+        peak = max(bin(mask).count("1") for mask in masks)
+        stats.count("determinize", peak_subset_size=peak)
+
+    tags = tags_at_end = None
+    if nfa.tags is not None:
+        tags = [nfa.mask_tags(mask) for mask in masks]
+        tags_at_end = [nfa.mask_end_tags(mask) for mask in masks]
+    return _DFATable(
+        boundaries=list(nfa.boundaries),
+        start=0,
+        table=table,
+        accepting=[bool(mask & nfa.accepting_mask) for mask in masks],
+        accepting_at_end=[bool(mask & nfa.end_accepting_mask) for mask in masks],
+        tags=tags,
+        tags_at_end=tags_at_end,
+    )
+
+
+@_traced("minimize", lambda dfa: {"states": dfa.nstates})
+def _minimize(dfa: _DFATable) -> _DFATable:
+    """Hopcroft's partition refinement on a complete DFA.
+
+    The returned DFA has its states numbered breadth first from the start state,
+    and the state that can't reach acceptance, if any, is replaced by DEAD.
+    """
+    n, k = dfa.nstates, dfa.nclasses
+    table = dfa.table
+
+    inverse: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(k)]
+    for s in range(n):
+        row = s * k
+        for c in range(k):
+            inverse[c][table[row + c]].append(s)
+
+    # States accepting different patterns must never be merged
+    initial: Dict[Hashable, Set[int]] = defaultdict(set)
+    for s in range(n):
+        if dfa.tags is not None and dfa.tags_at_end is not None:
+            initial[(dfa.tags[s], dfa.tags_at_end[s])].add(s)
+        else:
+            initial[(dfa.accepting[s], dfa.accepting_at_end[s])].add(s)
+    blocks: List[Set[int]] = list(initial.values())
+    block_of = [0] * n
+    for b, members in enumerate(blocks):
+        for s in members:
+            block_of[s] = b
+
+    # Every initial block but the largest is needed as a splitter
+    largest = max(range(len(blocks)), key=lambda b: len(blocks[b]))
+    worklist = [(b, c) for b in range(len(blocks)) if b != largest for c in range(k)]
+    waiting = set(worklist)
+    while worklist:
+        splitter = worklist.pop()
+        waiting.discard(splitter)
+        b, c = splitter
+        predecessors = inverse[c]
+        touched: Dict[int, List[int]] = defaultdict(list)
+        for t in blocks[b]:
+            for s in predecessors.get(t, ()):
+                touched[block_of[s]].append(s)
+
+        for y, touching in touched.items():
+            block = blocks[y]
+            if len(touching) == len(block):
+                continue
+            split = set(touching)
+            if 2 * len(split) <= len(block):
+                block -= split
+            else:
+                blocks[y] = split
+                split = block - split
+            # The new block is always the smaller half, so it's the one that has to
+            # be added as a splitter whether or not y already was one
+            z = len(blocks)
+            blocks.append(split)
+            for s in split:
+                block_of[s] = z
+            for d in range(k):
+                if (z, d) not in waiting:
+                    waiting.add((z, d))
+                    worklist.append((z, d))
+
+    # Renumber the blocks breadth first from the start and drop the dead block
+    def is_dead(b: int) -> bool:
+        s = next(iter(blocks[b]))
+        if dfa.accepting_at_end[s]:
+            return False
+        return all(block_of[table[s * k + c]] == b for c in range(k))
+
+    start = block_of[dfa.start]
+    numbers = {start: 0}
+    order = [start]
+    new_table: List[int] = []
+    i = 0
+    while i < len(order):
+        b = order[i]
+        i += 1
+        s = next(iter(blocks[b]))
+        for c in range(k):
+            target = block_of[table[s * k + c]]
+            if target not in numbers:
+                if is_dead(target):
+                    numbers[target] = DEAD
+                else:
+                    numbers[target] = len(order)
+                    order.append(target)
+            new_table.append(numbers[target])
+
+    stats = current_stats()
+    if stats is not None:
+        stats.count("minimize", states_before=n, blocks=len(blocks))
+
+    representatives = [next(iter(blocks[b])) for b in order]
+    tags = tags_at_end = None
+    if dfa.tags is not None and dfa.tags_at_end is not None:
+        tags = [dfa.tags[s] for s in representatives]
+        tags_at_end = [dfa.tags_at_end[s] for s in representatives]
+    return _DFATable(
+        boundaries=list(dfa.boundaries),
+        start=0,
+        table=new_table,
+        accepting=[dfa.accepting[s] for s in representatives],
+        accepting_at_end=[dfa.accepting_at_end[s] for s in representatives],
+        tags=tags,
+        tags_at_end=tags_at_end,
+    )
+
+
+def _to_automata(dfa: _DFATable) -> Automata:
+    """Builds an Automata with one State per DFA state.
+
+    Runs of classes with the same target are merged into a single interval.
+    States that accept more at the end of the input get an end of string edge to
+    an extra accepting state, one for each set of patterns accepted only there.
+    """
+    k = dfa.nclasses
+    states = [State() for _ in range(dfa.nstates)]
+    accepting_states = {
+        state for state, accepting in zip(states, dfa.accepting) if accepting
+    }
+    tags: Optional[Dict[State, FrozenSet[int]]] = None
+    if dfa.tags is not None:
+        tags = {state: dfa.tags[s] for s, state in enumerate(states) if dfa.tags[s]}
+    end_states: Dict[FrozenSet[int], State] = {}
+    for s, state in enumerate(states):
+        c = 0
+        while c < k:
+            target = dfa.table[s * k + c]
+            first = c
+            while c + 1 < k and dfa.table[s * k + c + 1] == target:
+                c += 1
+            if target != DEAD:
+                lo = dfa.boundaries[first]
+                hi = dfa.boundaries[c + 1] - 1 if c + 1 < k else MAX_CODE_POINT
+                state.transitions.add_range(lo, hi, {states[target]})
+            c += 1
+
+        if dfa.tags is not None and dfa.tags_at_end is not None:
+            end_only = dfa.tags_at_end[s] - dfa.tags[s]
+        elif dfa.accepting_at_end[s] and not dfa.accepting[s]:
+            end_only = frozenset([0])
+        else:
+            end_only = frozenset()
+        if end_only:
+            if end_only not in end_states:
+                end_states[end_only] = State()
+                accepting_states.add(end_states[end_only])
+                if tags is not None:
+                    tags[end_states[end_only]] = end_only
+            state.add_transition(AstConstant.end_of_string, end_states[end_only])
+
+    return Automata(
+        states={*states, *end_states.values()},
+        start_state=states[dfa.start],
+        accepting_states=accepting_states,
+        tags=tags,
+    )
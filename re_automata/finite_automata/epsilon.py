@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import Dict, List, Set
+
+from re_automata.finite_automata.automata import Automata, State
+from re_automata.finite_automata.tables import _NFATables, _iter_bits
+
+
+def _remove_epsilons(nfa: _NFATables) -> Automata:
+    """An equivalent epsilon-free automata, without useless states.
+
+    Every state takes over the character and end of string edges of all states in
+    its epsilon-closure, and accepts if its closure does. States that then can't be
+    reached from the start, or can't reach an accepting state, are dropped.
+    """
+    n = len(nfa.states)
+    successors: List[Set[int]] = []
+    for q in range(n):
+        targets: Set[int] = set()
+        for p in _iter_bits(nfa.closures[q]):
+            for _, _, numbers in nfa.intervals[p]:
+                targets.update(numbers)
+            targets.update(nfa.end_of_string[p])
+        successors.append(targets)
+
+    reachable = {0}
+    stack = [0]
+    while stack:
+        for t in successors[stack.pop()]:
+            if t not in reachable:
+                reachable.add(t)
+                stack.append(t)
+
+    predecessors: Dict[int, List[int]] = {q: [] for q in reachable}
+    for q in reachable:
+        for t in successors[q]:
+            predecessors[t].append(q)
+    useful = {q for q in reachable if nfa.closures[q] & nfa.accepting_mask}
+    stack = list(useful)
+    while stack:
+        for q in predecessors[stack.pop()]:
+            if q not in useful:
+                useful.add(q)
+                stack.append(q)
+    useful.add(0)
+
+    states = {q: State() for q in sorted(useful)}
+    for q, state in states.items():
+        for p in _iter_bits(nfa.closures[q]):
+            for lo, hi, numbers in nfa.intervals[p]:
+                kept = {states[t] for t in numbers if t in states}
+                if kept:
+                    state.transitions.add_range(lo, hi, kept)
+            state.transitions.end_of_string.update(
+                states[t] for t in nfa.end_of_string[p] if t in states
+            )
+
+    return Automata(
+        states=set(states.values()),
+        start_state=states[0],
+        accepting_states={
+            state for q, state in states.items() if nfa.closures[q] & nfa.accepting_mask
+        },
+    )
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from re_automata.finite_automata.automata import Automata
+from re_automata.finite_automata.product import _Product, _representative
+from re_automata.finite_automata.tables import _iter_bits
+
+# The state a state was first reached from, and the class it was reached on
+Paths = Dict[Hashable, Tuple[Optional[Hashable], int]]
+
+
+class Verdict(NamedTuple):
+    """The answer to a comparison of two automata, truthy if it holds.
+
+    If it doesn't, counterexample is a string that shows it.
+    """
+
+    holds: bool
+    counterexample: Optional[str] = None
+
+    def __bool__(self):
+        return self.holds
+
+
+def _never(accepted: Tuple[bool, ...]) -> bool:
+    return False
+
+
+def equivalent(a: Automata, b: Automata) -> Verdict:
+    """Whether a and b match the same strings.
+
+    Hopcroft and Karp's algorithm, checking that the start sets of states are
+    bisimilar up to congruence. Pairs of state sets (X, Y) reached on the same
+    input are explored breadth first, and a pair is skipped if X and Y are
+    already related: if they're in the same union-find class, or if they have
+    the same normal form when every related pair is used as a rewriting rule.
+    The counterexample is a string matched by exactly one of them.
+    """
+    product = _Product([a.tables, b.tables], _never)
+    nfa_a, nfa_b = product.automata
+    shift = len(nfa_a.states)
+
+    # Pairs are checked as one mask over the states of both automata
+    def join(x: int, y: int) -> int:
+        return x | y << shift
+
+    parents: Dict[int, int] = {}
+
+    def find(x: int) -> int:
+        root = x
+        while parents.get(root, root) != root:
+            root = parents[root]
+        while x != root:
+            parents[x], x = root, parents[x]
+        return root
+
+    rules: List[Tuple[int, int]] = []
+
+    def normal_form(x: int) -> int:
+        changed = True
+        while changed:
+            changed = False
+            for u, v in rules:
+                for side in (u, v):
+                    if side & ~x == 0 and (u | v) & ~x:
+                        x |= u | v
+                        changed = True
+        return x
+
+    start = product.start
+    paths: Paths = {start: (None, 0)}
+    todo = [start]
+    i = 0
+    while i < len(todo):
+        pair = todo[i]
+        i += 1
+        x, y = pair
+        left, right = join(x, 0), join(0, y)
+        root_left, root_right = find(left), find(right)
+        if root_left == root_right:
+            continue
+        if normal_form(left) == normal_form(right):
+            continue
+        if bool(x & nfa_a.end_accepting_mask) != bool(y & nfa_b.end_accepting_mask):
+            return Verdict(False, _path(product, paths, pair))
+        parents[root_left] = root_right
+        rules.append((left, right))
+        for c in range(len(product.boundaries)):
+            target = product.step(pair, c)
+            if target not in paths:
+                paths[target] = (pair, c)
+            todo.append(target)
+    return Verdict(True)
+
+
+def includes(a: Automata, b: Automata) -> Verdict:
+    """Whether a matches every string b matches.
+
+    The antichain algorithm explores pairs (p, Y) of a single state p of b and
+    the set of states Y that a can be in on the same input. Only a is
+    determinized, on the fly, and b is always the side tracked one state at a
+    time, whatever the sizes of the two. A pair with a smaller Y for the same p
+    is harder for a to accept, so only the pairs with minimal Y are kept. The
+    counterexample is a string matched by b but not by a.
+    """
+    product = _Product([a.tables, b.tables], _never)
+    nfa_a, nfa_b = product.automata
+    nclasses = len(product.boundaries)
+    classes_a, classes_b = product.classes
+
+    Pair = Tuple[int, int]
+    antichain: Dict[int, List[int]] = {}
+    paths: Paths = {}
+
+    def add(p: int, y: int, parent: Optional[Pair], c: int) -> Optional[Pair]:
+        kept = antichain.setdefault(p, [])
+        if any(smaller & ~y == 0 for smaller in kept):
+            return None
+        kept[:] = [larger for larger in kept if y & ~larger]
+        kept.append(y)
+        paths[(p, y)] = (parent, c)
+        return p, y
+
+    todo: List[Pair] = []
+    for p in _iter_bits(nfa_b.start_mask):
+        pair = add(p, nfa_a.start_mask, None, 0)
+        if pair is not None:
+            todo.append(pair)
+    i = 0
+    while i < len(todo):
+        pair = todo[i]
+        i += 1
+        p, y = pair
+        if y not in antichain[p]:
+            # Subsumed by a pair found after this one was queued
+            continue
+        if nfa_b.end_accepting_mask >> p & 1 and not y & nfa_a.end_accepting_mask:
+            return Verdict(False, _path(product, paths, pair))
+        for c in range(nclasses):
+            targets = nfa_b.step(1 << p, classes_b[c])
+            if not targets:
+                continue
+            y_next = nfa_a.step(y, classes_a[c]) if y else 0
+            for q in _iter_bits(targets):
+                added = add(q, y_next, pair, c)
+                if added is not None:
+                    todo.append(added)
+    return Verdict(True)
+
+
+def _path(product: _Product, paths: Paths, state: Hashable) -> str:
+    chars: List[str] = []
+    parent, c = paths[state]
+    while parent is not None:
+        chars.append(chr(_representative(*product.interval(c))))
+        parent, c = paths[parent]
+    return "".join(reversed(chars))
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import List, Set, Tuple, Union
+
+from re_automata.finite_automata.automata import (
+    Automata,
+    State,
+    _automata_counts,
+    _children,
+)
+from re_automata.stats import _traced
+from re_automata.regex.AST import (
+    Regex,
+    Char,
+    Or,
+    Concat,
+    Kleene,
+    Plus,
+    Maybe,
+    Group,
+    PosSet,
+    NegSet,
+    AstConstant,
+)
+
+Symbol = Union[Char, PosSet, NegSet, AstConstant]
+
+
+@_traced("glushkov", _automata_counts)
+def _glushkov(regex: Regex) -> Automata:
+    """Glushkov (position automaton) construction of an epsilon-free NFA.
+
+    Every character consuming leaf of the AST is a position and gets one state,
+    plus one initial state, so n positions give n + 1 states. The nullable, first
+    and last sets of every node, and the follow set of every position, are
+    computed bottom up. A position's state is entered on the position's symbol
+    from the initial state if the position is in first, and from every position
+    it follows.
+
+    The first and last sets of the children that are joined always come from
+    different subtrees, so they're disjoint lists of positions and a union costs
+    the size of its result. Follow sets are sets of positions, filled in as
+    concatenations and repetitions are built. The work is then bounded by the
+    number of transitions of the automata, which for a literal is linear in its
+    length.
+    """
+    symbols: List[Symbol] = []
+    follow: List[Set[int]] = []
+    # (nullable, first, last) of every built child, in post-order
+    built: List[Tuple[bool, List[int], List[int]]] = []
+    stack: List[Tuple[Regex, bool]] = [(regex, False)]
+    while stack:
+        node, children_built = stack.pop()
+        children = _children(node)
+        if children and not children_built:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        inner = built[len(built) - len(children) :]
+        del built[len(built) - len(children) :]
+
+        if node is AstConstant.epsilon:
+            built.append((True, [], []))
+        elif isinstance(node, (Char, AstConstant, PosSet, NegSet)):
+            position = [len(symbols)]
+            symbols.append(node)
+            follow.append(set())
+            built.append((False, position, position))
+        elif isinstance(node, Or):
+            nullable = False
+            first: List[int] = []
+            last: List[int] = []
+            for inner_nullable, inner_first, inner_last in inner:
+                nullable = nullable or inner_nullable
+                first.extend(inner_first)
+                last.extend(inner_last)
+            built.append((nullable, first, last))
+        elif isinstance(node, Concat):
+            nullable, first, last = inner[0]
+            for inner_nullable, inner_first, inner_last in inner[1:]:
+                for p in last:
+                    follow[p].update(inner_first)
+                if nullable:
+                    first = first + inner_first
+                last = last + inner_last if inner_nullable else inner_last
+                nullable = nullable and inner_nullable
+            built.append((nullable, first, last))
+        elif isinstance(node, (Kleene, Plus)):
+            ((nullable, first, last),) = inner
+            for p in last:
+                follow[p].update(first)
+            built.append((nullable or isinstance(node, Kleene), first, last))
+        elif isinstance(node, Maybe):
+            ((_, first, last),) = inner
+            built.append((True, first, last))
+        elif isinstance(node, Group):
+            built.extend(inner)
+        else:
+            raise NotImplementedError()
+
+    ((nullable, first, last),) = built
+    initial = State()
+    positions = [State() for _ in symbols]
+    for p in first:
+        initial.add_transition(symbols[p], positions[p])
+    for p, state in enumerate(positions):
+        for q in sorted(follow[p]):
+            state.add_transition(symbols[q], positions[q])
+
+    accepting_states = {positions[p] for p in last}
+    if nullable:
+        accepting_states.add(initial)
+    return Automata(
+        states={initial, *positions},
+        start_state=initial,
+        accepting_states=accepting_states,
+    )
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from re_automata.finite_automata.automata import Automata
+from re_automata.finite_automata.determinize import DEAD
+from re_automata.finite_automata.simulation import _search
+from re_automata.finite_automata.tables import _NFATables
+
+# Marks a transition that hasn't been determinized yet
+UNKNOWN = -2
+
+
+class _StateCache:
+    """The DFA states determinized so far, keyed by their NFA state mask.
+
+    extra_mask is added to every state reached, which with the start mask turns
+    the DFA into an unanchored one that can begin a match at any position.
+    """
+
+    def __init__(self, nfa: _NFATables, extra_mask: int, max_states: int):
+        self.nfa = nfa
+        self.extra_mask = extra_mask
+        self.max_states = max_states
+        self.flushes = 0
+        self.bad_flushes = 0
+        self.last_flush = 0
+        self._reset()
+
+    def flush(self):
+        self._reset()
+        self.flushes += 1
+
+    def _reset(self):
+        self.ids: Dict[int, int] = {}
+        self.masks: List[int] = []
+        self.table: List[int] = []
+        self.accepting: List[bool] = []
+        self.accepting_at_end: List[bool] = []
+        self.start = self.add(self.nfa.start_mask | self.extra_mask)
+
+    def add(self, mask: int) -> int:
+        self.ids[mask] = len(self.masks)
+        self.masks.append(mask)
+        self.table.extend([UNKNOWN] * self.nfa.nclasses)
+        self.accepting.append(bool(mask & self.nfa.accepting_mask))
+        self.accepting_at_end.append(bool(mask & self.nfa.end_accepting_mask))
+        return self.ids[mask]
+
+    def transition(self, state: int, c: int, pos: int, min_progress: int) -> int:
+        """Determinizes the transition from state on class c.
+
+        The cache is flushed when it's full, which invalidates every state id
+        other than the one returned. A flush less than min_progress characters
+        after the previous one counts as a bad flush.
+        """
+        mask = self.nfa.step(self.masks[state], c)
+        if not mask and not self.extra_mask:
+            self.table[state * self.nfa.nclasses + c] = DEAD
+            return DEAD
+        mask |= self.extra_mask
+        target = self.ids.get(mask)
+        if target is None:
+            if len(self.masks) >= self.max_states:
+                if pos - self.last_flush < min_progress:
+                    self.bad_flushes += 1
+                self.last_flush = pos
+                self.flush()
+                target = self.ids.get(mask)
+                return self.add(mask) if target is None else target
+            target = self.add(mask)
+        self.table[state * self.nfa.nclasses + c] = target
+        return target
+
+    def begin_scan(self):
+        self.bad_flushes = 0
+        self.last_flush = 0
+
+
+class LazyDFA:
+    """Matches an NFA with a DFA that is determinized on the fly.
+
+    Only the DFA states actually reached by the input are built, and at most
+    max_states of them are kept. When the cache is full it's flushed and
+    rebuilt from the current state. If a single scan has to flush more than
+    max_bad_flushes times, each time having used the states for fewer than
+    min_chars_per_state characters per state, the cache is thrashing and the rest
+    of that scan falls back to NFA simulation.
+
+    The cache can also be bounded by max_memory, an estimate in bytes of what
+    each of the two caches may hold, which is turned into max_states.
+    """
+
+    def __init__(
+        self,
+        nfa: Automata,
+        max_states: int = 10_000,
+        min_chars_per_state: int = 10,
+        max_bad_flushes: int = 3,
+        max_memory: Optional[int] = None,
+    ):
+        self.nfa = nfa.tables
+        if max_memory is not None:
+            max_states = max_memory // _state_size(self.nfa)
+        if max_states < 2:
+            raise ValueError("max_states has to be at least 2")
+        self.prefilter = nfa.prefilter
+        self.max_states = max_states
+        self.min_chars_per_state = min_chars_per_state
+        self.max_bad_flushes = max_bad_flushes
+        self.fallbacks = 0
+        self._anchored = _StateCache(self.nfa, 0, max_states)
+        self._unanchored = _StateCache(self.nfa, self.nfa.start_mask, max_states)
+
+    @property
+    def flushes(self) -> int:
+        return self._anchored.flushes + self._unanchored.flushes
+
+    @property
+    def nstates(self) -> int:
+        return len(self._anchored.masks) + len(self._unanchored.masks)
+
+    def _transition(self, cache: _StateCache, state: int, c: int, pos: int) -> int:
+        min_progress = self.min_chars_per_state * self.max_states
+        return cache.transition(state, c, pos, min_progress)
+
+    def _thrashing(self, cache: _StateCache) -> bool:
+        """Whether the scan should fall back to NFA simulation"""
+        if cache.bad_flushes > self.max_bad_flushes:
+            self.fallbacks += 1
+            return True
+        return False
+
+    def fullmatch(self, text: str) -> bool:
+        nfa = self.nfa
+        class_of = nfa.class_of
+        k = nfa.nclasses
+        cache = self._anchored
+        cache.begin_scan()
+        table = cache.table
+        state = cache.start
+        for i, ch in enumerate(text):
+            c = class_of(ord(ch))
+            target = table[state * k + c]
+            if target == UNKNOWN:
+                target = self._transition(cache, state, c, i)
+                if target == DEAD:
+                    return False
+                if self._thrashing(cache):
+                    return _fullmatch_from(nfa, cache.masks[target], text, i + 1)
+                table = cache.table
+            elif target == DEAD:
+                return False
+            state = target
+        return cache.accepting_at_end[state]
+
+    def match(self, text: str) -> Optional[Tuple[int, int]]:
+        """The span of the longest match at the start of text, or None"""
+        nfa = self.nfa
+        class_of = nfa.class_of
+        k = nfa.nclasses
+        cache = self._anchored
+        cache.begin_scan()
+        table = cache.table
+        accepting = cache.accepting
+        end = None
+        state = cache.start
+        for i, ch in enumerate(text):
+            if accepting[state]:
+                end = i
+            c = class_of(ord(ch))
+            target = table[state * k + c]
+            if target == UNKNOWN:
+                target = self._transition(cache, state, c, i)
+                if target != DEAD and self._thrashing(cache):
+                    end = _match_from(nfa, cache.masks[target], text, i + 1, end)
+                    return None if end is None else (0, end)
+                table = cache.table
+                accepting = cache.accepting
+            if target == DEAD:
+                return None if end is None else (0, end)
+            state = target
+        if cache.accepting_at_end[state]:
+            end = len(text)
+        return None if end is None else (0, end)
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """The span of the leftmost-longest match anywhere in text, or None.
+
+        An unanchored scan decides whether there is a match at all, which for most
+        inputs is the final answer. Only when there is a match is its span found
+        with NFA simulation. Text without the literals required by the automata's
+        prefilter is rejected before either.
+        """
+        starts = None
+        pos = 0
+        if self.prefilter is not None:
+            if self.prefilter.rejects(text):
+                return None
+            starts = self.prefilter.starts(text)
+            if starts is not None:
+                pos = starts.next(0)
+                if pos > len(text):
+                    return None
+        if self._matches_anywhere(text, pos):
+            return _search(self.nfa, text, starts)
+        return None
+
+    def _matches_anywhere(self, text: str, pos: int = 0) -> bool:
+        nfa = self.nfa
+        class_of = nfa.class_of
+        k = nfa.nclasses
+        cache = self._unanchored
+        cache.begin_scan()
+        table = cache.table
+        accepting = cache.accepting
+        state = cache.start
+        for i in range(pos, len(text)):
+            if accepting[state]:
+                return True
+            c = class_of(ord(text[i]))
+            target = table[state * k + c]
+            if target == UNKNOWN:
+                target = self._transition(cache, state, c, i)
+                if self._thrashing(cache):
+                    # Leave it to the NFA simulation in search
+                    return True
+                table = cache.table
+                accepting = cache.accepting
+            state = target
+        return cache.accepting_at_end[state]
+
+
+def _state_size(nfa: _NFATables) -> int:
+    """The approximate bytes taken by one cached state: its row of the table, its
+    NFA state mask and the entries for it in the lists and the dict of masks.
+    """
+    row = 8 * nfa.nclasses
+    mask = 28 + len(nfa.states) // 8
+    return row + mask + 4 * 8 + 100
+
+
+def _fullmatch_from(nfa: _NFATables, mask: int, text: str, pos: int) -> bool:
+    for i in range(pos, len(text)):
+        mask = nfa.step(mask, nfa.class_of(ord(text[i])))
+        if not mask:
+            return False
+    return bool(mask & nfa.end_accepting_mask)
+
+
+def _match_from(
+    nfa: _NFATables, mask: int, text: str, pos: int, end: Optional[int]
+) -> Optional[int]:
+    for i in range(pos, len(text)):
+        if mask & nfa.accepting_mask:
+            end = i
+        mask = nfa.step(mask, nfa.class_of(ord(text[i])))
+        if not mask:
+            return end
+    if mask & nfa.end_accepting_mask:
+        end = len(text)
+    return end
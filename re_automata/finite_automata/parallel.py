@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from re_automata.finite_automata.compiled import CompiledDFA
+from re_automata.finite_automata.determinize import DEAD
+
+Text = Union[str, bytes, bytearray, memoryview]
+
+# Inputs shorter than this are scanned in the calling process
+MIN_PARALLEL_LENGTH = 1 << 20
+
+# The DFA of a worker process, set once by _init_worker instead of with every chunk
+_worker_dfa: Optional[CompiledDFA] = None
+
+
+def parallel_fullmatch(
+    dfa: CompiledDFA,
+    text: Text,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> bool:
+    """Whether the whole text is matched, scanning chunks of it in parallel"""
+    state, _ = _parallel_scan(dfa, text, workers, chunk_size)
+    return state != DEAD and bool(dfa.accepting_at_end[state])
+
+
+def parallel_count(
+    dfa: CompiledDFA,
+    text: Text,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> int:
+    """The number of prefixes of text that are matched, including the empty one.
+
+    For a DFA of ".*(pattern)" this is the number of positions a match ends at.
+    """
+    state, count = _parallel_scan(dfa, text, workers, chunk_size)
+    if state != DEAD and dfa.accepting_at_end[state] and not dfa.accepting[state]:
+        count += 1
+    return count + dfa.accepting[dfa.start]
+
+
+def _parallel_scan(
+    dfa: CompiledDFA, text: Text, workers: Optional[int], chunk_size: Optional[int]
+) -> Tuple[int, int]:
+    """The state after text and the number of matched non-empty prefixes.
+
+    Every chunk but the first is run from every state of the DFA, giving a
+    mapping from the state a chunk starts in to the state it ends in and the
+    number of accepting positions passed. As DFA transitions compose, applying
+    the mappings from left to right gives the same result as a sequential scan.
+    text is first converted to what the DFA reads, see CompiledDFA._coerce.
+    """
+    text = dfa._coerce(text)
+    if not isinstance(text, str):
+        text = memoryview(text).cast("B")
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        if len(text) < MIN_PARALLEL_LENGTH or workers == 1:
+            (end,), (count,) = _scan_from(dfa, text, [dfa.start])
+            return end, count
+        chunk_size = -(-len(text) // workers)
+    chunks: Sequence[Union[str, bytes]]
+    if isinstance(text, str):
+        chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+    else:
+        # memoryviews can't be pickled
+        octets = text
+        chunks = [
+            bytes(octets[i : i + chunk_size]) for i in range(0, len(text), chunk_size)
+        ]
+    if not chunks:
+        return dfa.start, 0
+
+    everywhere = list(range(dfa.nstates))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(dfa,)
+    ) as pool:
+        first = pool.submit(_worker_scan, chunks[0], [dfa.start])
+        rest = pool.map(_worker_scan, chunks[1:], [everywhere] * (len(chunks) - 1))
+        (state,), (count,) = first.result()
+        for ends, counts in rest:
+            if state == DEAD:
+                break
+            count += counts[state]
+            state = ends[state]
+    return state, count
+
+
+def _init_worker(dfa: CompiledDFA):
+    global _worker_dfa
+    _worker_dfa = dfa
+
+
+def _worker_scan(chunk: Text, starts: List[int]) -> Tuple[List[int], List[int]]:
+    assert _worker_dfa is not None
+    return _scan_from(_worker_dfa, chunk, starts)
+
+
+def _scan_from(
+    dfa: CompiledDFA, chunk: Text, starts: Sequence[int]
+) -> Tuple[List[int], List[int]]:
+    """Runs chunk from each of starts, at once.
+
+    Returns the state each run ends in and the number of accepting positions it
+    passed. Runs that reach the same state behave the same from there on, so
+    they're merged and only the distinct states are stepped, which with most
+    DFAs quickly leaves a single run.
+    """
+    table = dfa.table
+    accepting = dfa.accepting
+    boundaries = dfa.boundaries
+    range_classes = dfa.range_classes
+    latin1 = dfa._latin1
+    k = dfa.nclasses
+
+    n = len(starts)
+    ends = [DEAD] * n
+    counts = [0] * n
+    # A merged run continues as parent, with an offset to the parent's count
+    parent = [-1] * n
+    offset = [0] * n
+    active: Dict[int, int] = {}
+    for run, state in enumerate(starts):
+        if state in active:
+            parent[run] = active[state]
+        else:
+            active[state] = run
+
+    code_points: Iterable[int]
+    code_points = map(ord, chunk) if isinstance(chunk, str) else memoryview(chunk)
+    for cp in code_points:
+        if not active:
+            break
+        if cp < 256:
+            cls = latin1[cp]
+        else:
+            cls = range_classes[bisect_right(boundaries, cp) - 1]
+        stepped: Dict[int, int] = {}
+        for state, run in active.items():
+            target = table[state * k + cls]
+            if target == DEAD:
+                continue
+            if accepting[target]:
+                counts[run] += 1
+            if target in stepped:
+                other = stepped[target]
+                parent[run] = other
+                offset[run] = counts[run] - counts[other]
+            else:
+                stepped[target] = run
+        active = stepped
+    for state, run in active.items():
+        ends[run] = state
+
+    # Runs merge into runs that were still active, so following the parents ends
+    resolved = [False] * n
+    for run in range(n):
+        path = []
+        while parent[run] != -1 and not resolved[run]:
+            path.append(run)
+            run = parent[run]
+        resolved[run] = True
+        for merged in reversed(path):
+            root = parent[merged]
+            ends[merged] = ends[root]
+            counts[merged] = offset[merged] + counts[root]
+            resolved[merged] = True
+    return ends, counts
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from re_automata.regex.AST import Regex
+from re_automata.regex.literals import Alternatives, literals
+
+
+class Prefilter:
+    """Rules out text for search with str.find before any automata is run.
+
+    Text containing none of the required factors can't match at all, and when
+    every match starts with one of the prefixes a match can only start where
+    one of them is found.
+    """
+
+    def __init__(
+        self, factors: Optional[Alternatives], prefixes: Optional[Alternatives]
+    ):
+        self.factors = None if factors is None else sorted(factors)
+        self.prefixes = None if prefixes is None else sorted(prefixes)
+
+    @classmethod
+    def from_regex(cls, regex: Regex) -> Optional[Prefilter]:
+        """The prefilter of a regex, or None if it has no required literals"""
+        required = literals(regex)
+        if required.factors is None and required.prefixes is None:
+            return None
+        return cls(required.factors, required.prefixes)
+
+    def rejects(self, text: str) -> bool:
+        """Whether text certainly has no match"""
+        if self.factors is None:
+            return False
+        return not any(factor in text for factor in self.factors)
+
+    def starts(self, text: str) -> Optional[_Starts]:
+        """The positions where a match may start, or None if that's anywhere"""
+        if self.prefixes is None:
+            return None
+        return _Starts(self.prefixes, text)
+
+    def __repr__(self):
+        return f"Prefilter(factors={self.factors}, prefixes={self.prefixes})"
+
+
+class _Starts:
+    """Finds the occurrences of any of several literals in a text.
+
+    The next occurrence of every literal is remembered and only searched for
+    again once it's passed, so each literal is scanned over the text once.
+    """
+
+    def __init__(self, literals: List[str], text: str):
+        self.literals = literals
+        self.text = text
+        self.found = [-1] * len(literals)
+
+    def next(self, pos: int) -> int:
+        """The first position from pos where a literal occurs, or past the end"""
+        text = self.text
+        first = len(text) + 1
+        for k, literal in enumerate(self.literals):
+            found = self.found[k]
+            if found < pos:
+                found = text.find(literal, pos)
+                if found == -1:
+                    # Never found again, so never searched for again
+                    found = len(text) + 1
+                self.found[k] = found
+            first = min(first, found)
+        return first
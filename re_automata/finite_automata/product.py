@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import itertools
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from re_automata.finite_automata.automata import Automata, State
+from re_automata.finite_automata.tables import _NFATables
+from re_automata.regex.AST import MAX_CODE_POINT
+
+# Whether a product state accepts, given which of the automata accept in it
+Accept = Callable[[Tuple[bool, ...]], bool]
+Masks = Tuple[int, ...]
+
+
+def _both(accepted: Tuple[bool, ...]) -> bool:
+    return all(accepted)
+
+
+def _first_only(accepted: Tuple[bool, ...]) -> bool:
+    first, second = accepted
+    return first and not second
+
+
+def _none(accepted: Tuple[bool, ...]) -> bool:
+    return not any(accepted)
+
+
+class _Product:
+    """The product of NFAs, determinized and explored on demand.
+
+    A product state is a tuple with the set of states, as a mask, of each NFA,
+    reached on the same input. The empty set is kept rather than dropped, so the
+    product is complete and can also accept where an NFA doesn't, like for a
+    complement. The character classes are the ones given by the union of the
+    boundaries of all NFAs.
+
+    An NFA with no state left never accepts again, so a product state can be
+    hopeless, like every state of an intersection where one NFA is stuck. The
+    searches don't go on from hopeless states.
+    """
+
+    def __init__(self, automata: Sequence[_NFATables], accept: Accept):
+        self.automata = automata
+        self.accept = accept
+        self.boundaries = sorted({b for nfa in automata for b in nfa.boundaries})
+        # The class of every product class in each NFA
+        self.classes = [[nfa.class_of(b) for b in self.boundaries] for nfa in automata]
+        self.start: Masks = tuple(nfa.start_mask for nfa in automata)
+        # Whether a state is hopeless, by which of the NFAs are stuck in it
+        self._hopeless: Dict[Tuple[bool, ...], bool] = {}
+
+    def accepting(self, masks: Masks) -> bool:
+        return self.accept(
+            tuple(
+                bool(mask & nfa.end_accepting_mask)
+                for mask, nfa in zip(masks, self.automata)
+            )
+        )
+
+    def hopeless(self, masks: Masks) -> bool:
+        """Whether no input leads from masks to an accepting state"""
+        stuck = tuple(not mask for mask in masks)
+        hopeless = self._hopeless.get(stuck)
+        if hopeless is None:
+            hopeless = self._hopeless[stuck] = not any(
+                self.accept(accepted)
+                for accepted in itertools.product((False, True), repeat=len(masks))
+                if not any(a and s for a, s in zip(accepted, stuck))
+            )
+        return hopeless
+
+    def step(self, masks: Masks, c: int) -> Masks:
+        return tuple(
+            nfa.step(mask, classes[c]) if mask else 0
+            for mask, nfa, classes in zip(masks, self.automata, self.classes)
+        )
+
+    def interval(self, c: int) -> Tuple[int, int]:
+        hi = (
+            self.boundaries[c + 1] - 1
+            if c + 1 < len(self.boundaries)
+            else MAX_CODE_POINT
+        )
+        return self.boundaries[c], hi
+
+    def shortest_accepted(self) -> Optional[str]:
+        """A shortest accepted string, or None if the product accepts nothing.
+
+        The product is searched breadth first and the search stops at the first
+        accepting state, so a non-empty product is usually only partly explored.
+        """
+        parents: Dict[Masks, Tuple[Optional[Masks], int]] = {self.start: (None, 0)}
+        order = [self.start]
+        i = 0
+        while i < len(order):
+            masks = order[i]
+            i += 1
+            if self.accepting(masks):
+                return self._path(parents, masks)
+            if self.hopeless(masks):
+                continue
+            for c in range(len(self.boundaries)):
+                target = self.step(masks, c)
+                if target not in parents:
+                    parents[target] = (masks, c)
+                    order.append(target)
+        return None
+
+    def _path(
+        self, parents: Dict[Masks, Tuple[Optional[Masks], int]], masks: Masks
+    ) -> str:
+        chars: List[str] = []
+        parent, c = parents[masks]
+        while parent is not None:
+            chars.append(chr(_representative(*self.interval(c))))
+            parent, c = parents[parent]
+        return "".join(reversed(chars))
+
+    def to_automata(self) -> Automata:
+        """Explores every reachable product state and builds an Automata of them.
+
+        States that can't reach acceptance are left out, except for the start.
+        Adjacent classes leading to the same state share one interval.
+        """
+        ids = {self.start: 0}
+        order = [self.start]
+        edges: List[List[int]] = []
+        i = 0
+        while i < len(order):
+            s = i
+            masks = order[i]
+            i += 1
+            if self.hopeless(masks):
+                # Dropped below with the other useless states
+                edges.append([s] * len(self.boundaries))
+                continue
+            row = []
+            for c in range(len(self.boundaries)):
+                target = self.step(masks, c)
+                if target not in ids:
+                    ids[target] = len(order)
+                    order.append(target)
+                row.append(ids[target])
+            edges.append(row)
+
+        reverse: List[List[int]] = [[] for _ in order]
+        for s, row in enumerate(edges):
+            for t in set(row):
+                reverse[t].append(s)
+        live = [s for s, masks in enumerate(order) if self.accepting(masks)]
+        useful = set(live)
+        while live:
+            for s in reverse[live.pop()]:
+                if s not in useful:
+                    useful.add(s)
+                    live.append(s)
+
+        states = {s: State() for s in range(len(order)) if s in useful or s == 0}
+        for s, state in states.items():
+            row = edges[s]
+            c = 0
+            while c < len(row):
+                first = c
+                while c + 1 < len(row) and row[c + 1] == row[c]:
+                    c += 1
+                if row[c] in useful:
+                    lo, _ = self.interval(first)
+                    _, hi = self.interval(c)
+                    state.transitions.add_range(lo, hi, {states[row[c]]})
+                c += 1
+        return Automata(
+            states=set(states.values()),
+            start_state=states[0],
+            accepting_states={
+                state for s, state in states.items() if self.accepting(order[s])
+            },
+        )
+
+
+class LazyProduct:
+    """The result of intersect, difference or complement, explored on demand.
+
+    Only the product states the question asked of it needs are built:
+    fullmatch follows the text from the start, and example and is_empty search
+    breadth first until the first accepting state. Transitions already taken
+    are kept for the next call. to_automata builds the whole reachable product
+    when an Automata is really needed.
+    """
+
+    def __init__(self, product: _Product):
+        self._product = product
+        self._transitions: Dict[Tuple[Masks, int], Masks] = {}
+        self._automata: Optional[Automata] = None
+
+    def fullmatch(self, text: str) -> bool:
+        """Whether the whole text is matched"""
+        product = self._product
+        transitions = self._transitions
+        boundaries = product.boundaries
+        masks = product.start
+        for char in text:
+            c = bisect_right(boundaries, ord(char)) - 1
+            target = transitions.get((masks, c))
+            if target is None:
+                target = transitions[(masks, c)] = product.step(masks, c)
+            masks = target
+            if product.hopeless(masks):
+                return False
+        return product.accepting(masks)
+
+    def example(self) -> Optional[str]:
+        """A shortest string that is matched, or None if there is none"""
+        return self._product.shortest_accepted()
+
+    def is_empty(self) -> bool:
+        """Whether no string is matched, stopping at the first one that is"""
+        return self.example() is None
+
+    def to_automata(self) -> Automata:
+        """An Automata of the whole reachable product, built once"""
+        if self._automata is None:
+            self._automata = self._product.to_automata()
+        return self._automata
+
+
+def _representative(lo: int, hi: int) -> int:
+    """A code point in lo..hi, readable if there's one"""
+    for preferred in (ord("a"), ord("A"), ord("0"), ord(" ")):
+        if lo <= preferred <= hi:
+            return preferred
+    if lo <= ord("~") and hi >= ord("!"):
+        return max(lo, ord("!"))
+    return lo
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from re_automata.finite_automata.automata import Automata, State
+from re_automata.finite_automata.compiled import CompiledDFA
+from re_automata.finite_automata.determinize import DEAD
+from re_automata.finite_automata.glushkov import _glushkov
+from re_automata.regex import from_string as regex_from_string
+from re_automata.regex.AST import AstConstant
+from re_automata.regex.simplify import simplify
+
+
+class RegexSet:
+    """Matches many patterns at once with a single DFA.
+
+    The patterns are unioned into one automata whose accepting states are tagged
+    with the index of their pattern. The tags are kept through determinization
+    and minimization, so a single pass over the input reports the index of every
+    pattern that matched.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        nfas = [
+            _glushkov(simplify(regex_from_string(pattern))) for pattern in self.patterns
+        ]
+        self._nfas = nfas
+        self._anchored = _union(nfas, anchored=True).compile()
+        # Only built on the first search
+        self._unanchored: Optional[CompiledDFA] = None
+
+    def fullmatch(self, text: str) -> List[int]:
+        """The indices of the patterns matching the whole text"""
+        dfa = self._anchored
+        assert dfa.tag_sets is not None and dfa.state_tags_at_end is not None
+        state = dfa.start
+        for c in text:
+            state = dfa.step(state, c)
+            if state == DEAD:
+                return []
+        return sorted(dfa.tag_sets[dfa.state_tags_at_end[state]])
+
+    def match(self, text: str) -> List[int]:
+        """The indices of the patterns matching at the start of text"""
+        return sorted(_scan(self._anchored, text, len(self.patterns)))
+
+    def search(self, text: str) -> List[int]:
+        """The indices of the patterns matching anywhere in text"""
+        if self._unanchored is None:
+            self._unanchored = _union(self._nfas, anchored=False).compile()
+        return sorted(_scan(self._unanchored, text, len(self.patterns)))
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+def _union(nfas: List[Automata], anchored: bool) -> Automata:
+    """An automata accepting any of the NFAs, tagged with their indices.
+
+    If it's not anchored the start state loops on any character, so a match can
+    begin anywhere.
+    """
+    start = State()
+    if not anchored:
+        start.add_transition(AstConstant.any, start)
+    states = {start}
+    tags: Dict[State, FrozenSet[int]] = {}
+    for i, nfa in enumerate(nfas):
+        start.add_transition(AstConstant.epsilon, nfa.start_state)
+        states |= nfa.states
+        for state in nfa.accepting_states:
+            tags[state] = tags.get(state, frozenset()) | {i}
+    return Automata(
+        states=states,
+        start_state=start,
+        accepting_states=set(tags),
+        tags=tags,
+    )
+
+
+def _scan(dfa: CompiledDFA, text: str, npatterns: int) -> Set[int]:
+    """The tags of every state passed while reading text, until the DFA dies"""
+    assert dfa.tag_sets is not None
+    assert dfa.state_tags is not None and dfa.state_tags_at_end is not None
+    tag_sets = dfa.tag_sets
+    state_tags = dfa.state_tags
+    table = dfa.table
+    boundaries = dfa.boundaries
+    range_classes = dfa.range_classes
+    latin1 = dfa._latin1
+    k = dfa.nclasses
+    found: Set[int] = set()
+    state = dfa.start
+    for c in text:
+        # Tag set 0 is the empty one
+        if state_tags[state]:
+            found |= tag_sets[state_tags[state]]
+            if len(found) == npatterns:
+                return found
+        cp = ord(c)
+        if cp < 256:
+            cls = latin1[cp]
+        else:
+            cls = range_classes[bisect_right(boundaries, cp) - 1]
+        state = table[state * k + cls]
+        if state == DEAD:
+            return found
+    found |= tag_sets[dfa.state_tags_at_end[state]]
+    return found
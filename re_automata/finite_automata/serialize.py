@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import TYPE_CHECKING, Final, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from re_automata.finite_automata.compiled import CompiledDFA
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+MAGIC = b"REDF"
+VERSION = 1
+
+# magic, version, flags, nstates, nclasses, nranges, start, ntag_sets, ntags,
+# pattern length in bytes and a CRC32 of everything after the header
+_HEADER = struct.Struct("<4sHHiiiiiiiI")
+_TAGGED = 1
+_BIG_ENDIAN = 2
+_UTF8 = 4
+
+# The arrays are stored as native ints, so they can be used straight from the file
+_INT: Final = "i"
+_INT_SIZE = array(_INT).itemsize
+
+
+def _native_flags() -> int:
+    return _BIG_ENDIAN if sys.byteorder == "big" else 0
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _INT_SIZE) * _INT_SIZE
+
+
+def _layout(
+    nstates: int, nclasses: int, nranges: int, ntag_sets: int, ntags: int, tagged: bool
+) -> List[Tuple[str, str, int]]:
+    """The (name, format, length) of every section, in the order they're stored"""
+    sections = [
+        ("boundaries", _INT, nranges),
+        ("range_classes", _INT, nranges),
+        ("table", _INT, nstates * nclasses),
+    ]
+    if tagged:
+        sections += [
+            ("state_tags", _INT, nstates),
+            ("state_tags_at_end", _INT, nstates),
+            ("tag_offsets", _INT, ntag_sets + 1),
+            ("tags", _INT, ntags),
+        ]
+    sections += [
+        ("accepting", "B", nstates),
+        ("accepting_at_end", "B", nstates),
+    ]
+    return sections
+
+
+def _save(dfa: CompiledDFA, path: PathLike):
+    tagged = dfa.tag_sets is not None
+    tag_offsets = array(_INT, [0])
+    tags = array(_INT)
+    if dfa.tag_sets is not None:
+        for tag_set in dfa.tag_sets:
+            tags.extend(sorted(tag_set))
+            tag_offsets.append(len(tags))
+    values = {
+        "boundaries": array(_INT, dfa.boundaries),
+        "range_classes": array(_INT, dfa.range_classes),
+        "table": array(_INT, dfa.table),
+        "state_tags": array(_INT, dfa.state_tags or ()),
+        "state_tags_at_end": array(_INT, dfa.state_tags_at_end or ()),
+        "tag_offsets": tag_offsets,
+        "tags": tags,
+        "accepting": bytes(dfa.accepting),
+        "accepting_at_end": bytes(dfa.accepting_at_end),
+    }
+    pattern = (dfa.pattern or "").encode()
+    ntag_sets = len(dfa.tag_sets) if dfa.tag_sets is not None else 0
+    layout = _layout(
+        dfa.nstates, dfa.nclasses, len(dfa.boundaries), ntag_sets, len(tags), tagged
+    )
+
+    body = bytearray()
+    for name, _, _ in layout:
+        body += bytes(_align(len(body)) - len(body))
+        body += bytes(values[name])
+    body += pattern
+
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        _native_flags() | (_TAGGED if tagged else 0) | (_UTF8 if dfa.utf8 else 0),
+        dfa.nstates,
+        dfa.nclasses,
+        len(dfa.boundaries),
+        dfa.start,
+        ntag_sets,
+        len(tags),
+        len(pattern),
+        zlib.crc32(body),
+    )
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(body)
+
+
+def _load(path: PathLike, pattern: Optional[str] = None, verify: bool = True):
+    """Maps the file and builds a CompiledDFA on memoryviews of it.
+
+    Only the tag sets are copied out of the file, so processes loading the same
+    file share its pages.
+    """
+    from re_automata.finite_automata.compiled import CompiledDFA
+
+    with open(path, "rb") as f:
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is too short to be a compiled DFA")
+    (
+        magic,
+        version,
+        flags,
+        nstates,
+        nclasses,
+        nranges,
+        start,
+        ntag_sets,
+        ntags,
+        pattern_size,
+        checksum,
+    ) = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a compiled DFA")
+    if version != VERSION:
+        raise ValueError(f"{path} has version {version}, expected {VERSION}")
+    if flags & _BIG_ENDIAN != _native_flags():
+        raise ValueError(f"{path} was saved on a machine with another byte order")
+    body = data[_HEADER.size :]
+    if verify and zlib.crc32(body) != checksum:
+        raise ValueError(f"{path} is corrupt, its checksum doesn't match")
+
+    tagged = bool(flags & _TAGGED)
+    sections = {}
+    offset = 0
+    for name, fmt, length in _layout(
+        nstates, nclasses, nranges, ntag_sets, ntags, tagged
+    ):
+        offset = _align(offset)
+        size = length * (_INT_SIZE if fmt == _INT else 1)
+        if offset + size > len(body):
+            raise ValueError(f"{path} is truncated")
+        section = body[offset : offset + size]
+        sections[name] = section.cast(_INT) if fmt == _INT else section.cast("B")
+        offset += size
+    if offset + pattern_size != len(body):
+        raise ValueError(f"{path} is truncated")
+    stored_pattern = bytes(body[offset:]).decode() or None
+    if pattern is not None and pattern != stored_pattern:
+        raise ValueError(
+            f"{path} was compiled from {stored_pattern!r}, expected {pattern!r}"
+        )
+
+    tag_sets = None
+    if tagged:
+        offsets, tags = sections["tag_offsets"], sections["tags"]
+        tag_sets = [
+            frozenset(tags[offsets[i] : offsets[i + 1]]) for i in range(ntag_sets)
+        ]
+    return CompiledDFA(
+        boundaries=sections["boundaries"],
+        range_classes=sections["range_classes"],
+        nclasses=nclasses,
+        start=start,
+        table=sections["table"],
+        accepting=sections["accepting"],
+        accepting_at_end=sections["accepting_at_end"],
+        pattern=stored_pattern,
+        tag_sets=tag_sets,
+        state_tags=sections.get("state_tags"),
+        state_tags_at_end=sections.get("state_tags_at_end"),
+        utf8=bool(flags & _UTF8),
+    )
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from re_automata.finite_automata.prefilter import _Starts
+from re_automata.finite_automata.tables import _NFATables
+
+
+def _fullmatch(nfa: _NFATables, text: str) -> bool:
+    mask = nfa.start_mask
+    for c in text:
+        mask = nfa.step(mask, nfa.class_of(ord(c)))
+        if not mask:
+            return False
+    return bool(mask & nfa.end_accepting_mask)
+
+
+def _match(nfa: _NFATables, text: str, pos: int = 0) -> Optional[int]:
+    """The end of the longest match starting at pos, or None"""
+    end = None
+    mask = nfa.start_mask
+    for i in range(pos, len(text)):
+        if mask & nfa.accepting_mask:
+            end = i
+        mask = nfa.step(mask, nfa.class_of(ord(text[i])))
+        if not mask:
+            return end
+    if mask & nfa.end_accepting_mask:
+        end = len(text)
+    return end
+
+
+def _search(
+    nfa: _NFATables, text: str, starts: Optional[_Starts] = None
+) -> Optional[Tuple[int, int]]:
+    """The span of the leftmost-longest match, or None.
+
+    A new group of active states is started at every position until a match is
+    found. Groups are ordered by where they started, and a state that is active in
+    an earlier group is dropped from later ones since the earlier start is
+    preferred for whatever follows. There are therefore never more groups than
+    states, and the simulation stays linear in the length of the text.
+
+    With starts, groups are only started where starts finds a match could start,
+    and the text in between is skipped while no group is active.
+    """
+    n = len(text)
+    best: Optional[Tuple[int, int]] = None
+    groups: List[Tuple[int, int]] = []
+    candidate = 0 if starts is None else starts.next(0)
+    i = 0
+    while True:
+        if best is None:
+            if not groups:
+                if candidate > n:
+                    break
+                i = candidate
+            if i == candidate:
+                seen = 0
+                for _, mask in groups:
+                    seen |= mask
+                new = nfa.start_mask & ~seen
+                if new:
+                    groups.append((i, new))
+                candidate = i + 1 if starts is None else starts.next(i + 1)
+
+        accepting = nfa.end_accepting_mask if i == n else nfa.accepting_mask
+        for g, (start, mask) in enumerate(groups):
+            if mask & accepting:
+                best = (start, i)
+                # Matches starting later can no longer be leftmost
+                del groups[g + 1 :]
+                break
+
+        if i == n or (best is not None and not groups):
+            break
+
+        c = nfa.class_of(ord(text[i]))
+        seen = 0
+        stepped = []
+        for start, mask in groups:
+            mask = nfa.step(mask, c) & ~seen
+            if mask:
+                seen |= mask
+                stepped.append((start, mask))
+        groups = stepped
+        i += 1
+    return best
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import codecs
+from bisect import bisect_right
+from typing import Iterable, Optional, Union
+
+from re_automata.finite_automata.compiled import CompiledDFA
+from re_automata.finite_automata.determinize import DEAD
+
+Chunk = Union[str, bytes, bytearray, memoryview]
+
+
+class StreamMatcher:
+    """Runs a CompiledDFA over input given in chunks.
+
+    Only the DFA state is carried between chunks, so the input is never joined.
+    A DFA compiled with utf8 reads bytes-like chunks, which also covers mmap
+    objects, through a memoryview without copying, and str chunks encoded to
+    UTF-8. Any other DFA reads str chunks as code points, and bytes-like chunks
+    decoded as UTF-8 with an incremental decoder, so characters may be split
+    between chunks. A scan stops early once the DFA is dead.
+
+    The matcher is anchored at the start of the input, to find where matches
+    anywhere in the input end compile ".*(pattern)" instead.
+    """
+
+    def __init__(self, dfa: CompiledDFA):
+        self.dfa = dfa
+        self.state = dfa.start
+        # Number of characters fed so far, or of bytes for a DFA reading UTF-8
+        self.position = 0
+        # End of the first and of the last prefix of the input that matched
+        self.first_match_end: Optional[int] = None
+        self.match_end: Optional[int] = None
+        self.finished = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        if dfa.accepting[self.state]:
+            self.first_match_end = self.match_end = 0
+
+    @property
+    def dead(self) -> bool:
+        """Whether no more input can lead to a match"""
+        return self.state == DEAD
+
+    def feed(self, chunk: Chunk):
+        if self.finished:
+            raise ValueError("Can't feed a StreamMatcher after finish()")
+        if isinstance(chunk, str) and self.dfa.utf8:
+            encoded = chunk.encode("utf-8", "surrogatepass")
+            self._run(encoded, len(encoded), wide=False)
+        elif isinstance(chunk, str):
+            self._run(map(ord, chunk), len(chunk), wide=True)
+        elif self.dfa.utf8:
+            with memoryview(chunk) as view, view.cast("B") as octets:
+                self._run(octets, len(octets), wide=False)
+        else:
+            text = self._decoder.decode(chunk)
+            self._run(map(ord, text), len(text), wide=True)
+
+    def _run(self, code_points: Iterable[int], length: int, wide: bool):
+        if self.state == DEAD:
+            self.position += length
+            return
+        dfa = self.dfa
+        table = dfa.table
+        accepting = dfa.accepting
+        boundaries = dfa.boundaries
+        range_classes = dfa.range_classes
+        latin1 = dfa._latin1
+        k = dfa.nclasses
+        state = self.state
+        pos = self.position
+        match_end = self.match_end
+        for cp in code_points:
+            if wide and cp >= 256:
+                cls = range_classes[bisect_right(boundaries, cp) - 1]
+            else:
+                cls = latin1[cp]
+            state = table[state * k + cls]
+            pos += 1
+            if state == DEAD:
+                break
+            if accepting[state]:
+                match_end = pos
+                if self.first_match_end is None:
+                    self.first_match_end = pos
+        self.state = state
+        self.match_end = match_end
+        # Whatever wasn't read after the DFA died still counts as fed
+        self.position += length
+
+    def finish(self) -> bool:
+        """Ends the input, returns whether all of it was matched.
+
+        Raises UnicodeDecodeError if bytes fed to a DFA reading code points end
+        in the middle of a character.
+        """
+        if not self.finished:
+            self._decoder.decode(b"", final=True)
+            self.finished = True
+            if self.state != DEAD and self.dfa.accepting_at_end[self.state]:
+                self.match_end = self.position
+                if self.first_match_end is None:
+                    self.first_match_end = self.position
+        return self.match_end == self.position
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(position={self.position}, "
+            f"match_end={self.match_end}, dead={self.dead})"
+        )
+
+
+async def match_stream(
+    dfa: CompiledDFA, reader: asyncio.StreamReader, chunk_size: int = 1 << 16
+) -> StreamMatcher:
+    """Feeds everything read from reader to a new StreamMatcher and finishes it.
+
+    Reading stops as soon as the DFA is dead, leaving the rest in the reader.
+    """
+    matcher = StreamMatcher(dfa)
+    while not matcher.dead:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            break
+        matcher.feed(chunk)
+    matcher.finish()
+    return matcher
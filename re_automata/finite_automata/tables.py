@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from re_automata.finite_automata.automata import Automata, State
+from re_automata.regex.AST import MAX_CODE_POINT
+from re_automata.stats import _traced
+
+
+def _iter_bits(mask: int) -> Iterator[int]:
+    """Yields the index of every set bit in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class _NFATables:
+    """A numbered, table based view of an NFA.
+
+    States are numbered breadth first from the start state, so a set of states is
+    represented as an int bitmask. The alphabet is reduced to the disjoint
+    character classes given by the boundaries of all labels in the automata, where
+    class i covers the code points boundaries[i] up to boundaries[i + 1] - 1.
+    """
+
+    def __init__(self, nfa: Automata):
+        states: List[State] = [nfa.start_state]
+        index: Dict[State, int] = {nfa.start_state: 0}
+        epsilon: List[List[int]] = []
+        end_of_string: List[List[int]] = []
+        intervals: List[List[Tuple[int, int, List[int]]]] = []
+
+        def number(targets: Set[State]) -> List[int]:
+            numbers = []
+            for target in targets:
+                if target not in index:
+                    index[target] = len(states)
+                    states.append(target)
+                numbers.append(index[target])
+            return numbers
+
+        i = 0
+        while i < len(states):
+            state = states[i]
+            i += 1
+            epsilon.append(number(state.transitions.epsilon))
+            end_of_string.append(number(state.transitions.end_of_string))
+            intervals.append(
+                [
+                    (lo, hi, number(targets))
+                    for lo, hi, targets in state.transitions.intervals()
+                ]
+            )
+
+        self.states = states
+        self.index = index
+        self.epsilon = epsilon
+        self.end_of_string = end_of_string
+        self.intervals = intervals
+
+        boundaries = {0}
+        for state_intervals in intervals:
+            for lo, hi, _ in state_intervals:
+                boundaries.add(lo)
+                if hi < MAX_CODE_POINT:
+                    boundaries.add(hi + 1)
+        self.boundaries = sorted(boundaries)
+        self.latin1 = [bisect_right(self.boundaries, cp) - 1 for cp in range(256)]
+
+        self.closures = _epsilon_closures(epsilon)
+        self.start_mask = self.closures[0]
+        self.accepting_mask = 0
+        for state in nfa.accepting_states:
+            if state in index:
+                self.accepting_mask |= 1 << index[state]
+        self.end_accepting_mask = self._end_accepting(epsilon, end_of_string)
+
+        # The pattern ids accepted by every state, and accepted by it when the
+        # input ends, for tagged automata
+        self.tags: Optional[List[FrozenSet[int]]] = None
+        self.end_tags: Optional[List[FrozenSet[int]]] = None
+        if nfa.tags is not None:
+            self.tags = [nfa.tags.get(state, frozenset()) for state in states]
+            self.end_tags = self._end_tags(epsilon, end_of_string)
+
+        # For every class: a mask of the states with an edge on it, and the
+        # closed target mask of each of those states
+        self.has_edge = [0] * len(self.boundaries)
+        self.rows: List[Dict[int, int]] = [{} for _ in self.boundaries]
+        for q, state_intervals in enumerate(intervals):
+            for lo, hi, numbers in state_intervals:
+                target_mask = 0
+                for t in numbers:
+                    target_mask |= self.closures[t]
+                for c in range(self.class_of(lo), self.class_of(hi) + 1):
+                    self.has_edge[c] |= 1 << q
+                    row = self.rows[c]
+                    row[q] = row.get(q, 0) | target_mask
+
+    @property
+    def nclasses(self) -> int:
+        return len(self.boundaries)
+
+    def class_of(self, code_point: int) -> int:
+        if code_point < 256:
+            return self.latin1[code_point]
+        return bisect_right(self.boundaries, code_point) - 1
+
+    def step(self, mask: int, c: int) -> int:
+        """The closed set of states reached from mask on a character of class c"""
+        row = self.rows[c]
+        target = 0
+        for q in _iter_bits(mask & self.has_edge[c]):
+            target |= row[q]
+        return target
+
+    def mask_tags(self, mask: int) -> FrozenSet[int]:
+        """The pattern ids accepted by a set of states of a tagged automata"""
+        assert self.tags is not None
+        tags: FrozenSet[int] = frozenset()
+        for q in _iter_bits(mask & self.accepting_mask):
+            tags |= self.tags[q]
+        return tags
+
+    def mask_end_tags(self, mask: int) -> FrozenSet[int]:
+        """The pattern ids accepted by a set of states when the input ends"""
+        assert self.end_tags is not None
+        tags: FrozenSet[int] = frozenset()
+        for q in _iter_bits(mask & self.end_accepting_mask):
+            tags |= self.end_tags[q]
+        return tags
+
+    def _end_tags(
+        self, epsilon: List[List[int]], end_of_string: List[List[int]]
+    ) -> List[FrozenSet[int]]:
+        assert self.tags is not None
+        reverse = _reverse(epsilon, end_of_string)
+        end_tags: List[Set[int]] = [set() for _ in epsilon]
+        for a in _iter_bits(self.accepting_mask):
+            tags = self.tags[a]
+            stack = [a]
+            visited = {a}
+            while stack:
+                q = stack.pop()
+                end_tags[q] |= tags
+                for p in reverse[q]:
+                    if p not in visited:
+                        visited.add(p)
+                        stack.append(p)
+        return [frozenset(tags) for tags in end_tags]
+
+    def _end_accepting(
+        self, epsilon: List[List[int]], end_of_string: List[List[int]]
+    ) -> int:
+        """Mask of the states that reach an accepting state through only epsilon and
+        end of string edges, i.e. the states that accept when the input ends.
+        """
+        reverse = _reverse(epsilon, end_of_string)
+        mask = self.accepting_mask
+        stack = list(_iter_bits(mask))
+        while stack:
+            for q in reverse[stack.pop()]:
+                if not mask >> q & 1:
+                    mask |= 1 << q
+                    stack.append(q)
+        return mask
+
+
+@_traced("tables", lambda t: {"states": len(t.states), "classes": t.nclasses})
+def _build_tables(nfa: Automata) -> _NFATables:
+    return _NFATables(nfa)
+
+
+def _reverse(
+    epsilon: List[List[int]], end_of_string: List[List[int]]
+) -> List[List[int]]:
+    """The reversed graph of the epsilon and end of string edges"""
+    reverse: List[List[int]] = [[] for _ in epsilon]
+    for q, targets in enumerate(epsilon):
+        for t in targets:
+            reverse[t].append(q)
+    for q, targets in enumerate(end_of_string):
+        for t in targets:
+            reverse[t].append(q)
+    return reverse
+
+
+def _epsilon_closures(epsilon: List[List[int]]) -> List[int]:
+    """The epsilon-closure mask of every state.
+
+    The strongly connected components of the epsilon graph are found with an
+    iterative Tarjan's algorithm, which completes a component only after every
+    component reachable from it. All states in a component share one closure,
+    the union of its members and the closures of the components it has edges to,
+    so every closure is computed once even with the epsilon cycles of Kleene and
+    Plus.
+    """
+    n = len(epsilon)
+    closures = [0] * n
+    order = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    component: List[int] = []
+    counter = 0
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        # Each frame is a state and the index of its next edge to visit
+        frames = [(root, 0)]
+        order[root] = low[root] = counter
+        counter += 1
+        component.append(root)
+        on_stack[root] = True
+        while frames:
+            q, i = frames[-1]
+            if i < len(epsilon[q]):
+                frames[-1] = (q, i + 1)
+                t = epsilon[q][i]
+                if order[t] == -1:
+                    order[t] = low[t] = counter
+                    counter += 1
+                    component.append(t)
+                    on_stack[t] = True
+                    frames.append((t, 0))
+                elif on_stack[t]:
+                    low[q] = min(low[q], order[t])
+                continue
+
+            frames.pop()
+            if frames:
+                parent = frames[-1][0]
+                low[parent] = min(low[parent], low[q])
+            if low[q] != order[q]:
+                continue
+            members = []
+            while True:
+                t = component.pop()
+                on_stack[t] = False
+                members.append(t)
+                if t == q:
+                    break
+            mask = 0
+            for t in members:
+                mask |= 1 << t
+            for t in members:
+                for target in epsilon[t]:
+                    mask |= closures[target]
+            for t in members:
+                closures[t] = mask
+    return closures
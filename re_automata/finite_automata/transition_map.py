@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Set, Tuple, Union
+
+from re_automata.regex.AST import AstConstant, Char, Range, MAX_CODE_POINT
+from re_automata.stats import current_stats
+
+if TYPE_CHECKING:
+    from re_automata.finite_automata.automata import State, TransitionLabel
+
+
+class TransitionMap:
+    """The edges out of a state, as a map from code points to target states.
+
+    Character edges are kept as sorted, disjoint intervals in parallel lists, so
+    looking up a code point is a bisection. Adding an interval that overlaps
+    existing ones splits them at the boundaries, and the overlapping parts lead
+    to the union of the targets. Epsilon and end of string edges don't consume a
+    character and are kept as plain sets.
+    """
+
+    __slots__ = ("_starts", "_ends", "_targets", "epsilon", "end_of_string")
+
+    def __init__(self):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._targets: List[Set[State]] = []
+        self.epsilon: Set[State] = set()
+        self.end_of_string: Set[State] = set()
+
+    def add(self, label: TransitionLabel, states: Set[State]):
+        if label is AstConstant.epsilon:
+            self.epsilon |= states
+        elif label is AstConstant.end_of_string:
+            self.end_of_string |= states
+        else:
+            self.add_range(*_label_bounds(label), states)
+
+    def remove(self, label: TransitionLabel):
+        if label is AstConstant.epsilon:
+            self.epsilon = set()
+        elif label is AstConstant.end_of_string:
+            self.end_of_string = set()
+        else:
+            self.remove_range(*_label_bounds(label))
+
+    def add_range(self, lo: int, hi: int, states: Set[State]):
+        """Adds edges to states for the code points lo up to and including hi"""
+        if lo > hi:
+            return
+        starts, ends, targets = self._starts, self._ends, self._targets
+        i = bisect_left(ends, lo)
+        j = i
+        new_starts: List[int] = []
+        new_ends: List[int] = []
+        new_targets: List[Set[State]] = []
+        at = lo
+        while j < len(starts) and starts[j] <= hi:
+            start, end, old = starts[j], ends[j], targets[j]
+            if start < lo:
+                new_starts.append(start)
+                new_ends.append(lo - 1)
+                new_targets.append(old)
+            elif at < start:
+                new_starts.append(at)
+                new_ends.append(start - 1)
+                new_targets.append(set(states))
+            overlap_start, overlap_end = max(start, lo), min(end, hi)
+            new_starts.append(overlap_start)
+            new_ends.append(overlap_end)
+            new_targets.append(old | states)
+            if end > hi:
+                new_starts.append(hi + 1)
+                new_ends.append(end)
+                new_targets.append(set(old))
+            at = overlap_end + 1
+            j += 1
+        if at <= hi:
+            new_starts.append(at)
+            new_ends.append(hi)
+            new_targets.append(set(states))
+
+        starts[i:j] = new_starts
+        ends[i:j] = new_ends
+        targets[i:j] = new_targets
+        if j > i:
+            # Only overlapping labels split intervals, so this is off the fast path
+            stats = current_stats()
+            if stats is not None:
+                stats.count("add_transition", splits=j - i)
+
+    def add_ranges(self, ranges: Iterable[Tuple[int, int]], states: Set[State]):
+        """Adds edges to states for sorted, disjoint (start, end) ranges"""
+        if self._starts:
+            for lo, hi in ranges:
+                self.add_range(lo, hi, states)
+            return
+        for lo, hi in ranges:
+            self._starts.append(lo)
+            self._ends.append(hi)
+            self._targets.append(set(states))
+
+    def remove_range(self, lo: int, hi: int):
+        """Removes all edges for the code points lo up to and including hi"""
+        starts, ends, targets = self._starts, self._ends, self._targets
+        i = bisect_left(ends, lo)
+        j = i
+        new_starts: List[int] = []
+        new_ends: List[int] = []
+        new_targets: List[Set[State]] = []
+        while j < len(starts) and starts[j] <= hi:
+            start, end, old = starts[j], ends[j], targets[j]
+            if start < lo:
+                new_starts.append(start)
+                new_ends.append(lo - 1)
+                new_targets.append(old)
+            if end > hi:
+                new_starts.append(hi + 1)
+                new_ends.append(end)
+                new_targets.append(set(old))
+            j += 1
+
+        starts[i:j] = new_starts
+        ends[i:j] = new_ends
+        targets[i:j] = new_targets
+
+    def lookup(self, code_point: int) -> Set[State]:
+        """The states reached on the code point"""
+        i = bisect_right(self._starts, code_point) - 1
+        if i >= 0 and self._ends[i] >= code_point:
+            return self._targets[i]
+        return set()
+
+    def intervals(self) -> Iterator[Tuple[int, int, Set[State]]]:
+        """Yields all (start, end, states) character edges, ordered by start"""
+        return zip(self._starts, self._ends, self._targets)
+
+    def __iter__(self) -> Iterator[Tuple[TransitionLabel, Set[State]]]:
+        """Yields all (label, states) pairs, the ones without a character first"""
+        if self.end_of_string:
+            yield AstConstant.end_of_string, self.end_of_string
+        if self.epsilon:
+            yield AstConstant.epsilon, self.epsilon
+        for start, end, states in self.intervals():
+            label: Union[Char, Range] = (
+                Char(chr(start))
+                if start == end
+                else Range(Char(chr(start)), Char(chr(end)))
+            )
+            yield label, states
+
+    def __len__(self):
+        return len(self._starts) + bool(self.epsilon) + bool(self.end_of_string)
+
+
+def _label_bounds(label: TransitionLabel) -> Tuple[int, int]:
+    """The inclusive interval of code points matched by a label"""
+    if isinstance(label, Char):
+        c = ord(label.s)
+        return c, c
+    if isinstance(label, Range):
+        return ord(label.start.s), ord(label.end.s)
+    if label is AstConstant.any:
+        return 0, MAX_CODE_POINT
+    raise ValueError(f"{label!r} does not match a character")
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, List, Tuple
+
+from re_automata.finite_automata.automata import Automata, State
+from re_automata.finite_automata.tables import _NFATables
+
+ByteRanges = Tuple[Tuple[int, int], ...]
+
+# The largest code point encoded with 1, 2 and 3 bytes
+_ENCODED_LENGTH_ENDS = (0x7F, 0x7FF, 0xFFFF)
+_SURROGATES = (0xD800, 0xDFFF)
+
+
+def _utf8_sequences(lo: int, hi: int) -> List[ByteRanges]:
+    """The UTF-8 encodings of the code points lo to hi as sequences of byte ranges.
+
+    The range is split until both ends encode to the same number of bytes and
+    every byte but the first covers its whole continuation range below the
+    byte where the ends differ. The encodings of the ends then give the byte
+    range at every position. Surrogates have no encoding and are left out.
+    """
+    sequences: List[ByteRanges] = []
+    stack = [(lo, hi)]
+    while stack:
+        lo, hi = stack.pop()
+        if lo > hi:
+            continue
+        if lo <= _SURROGATES[1] and hi >= _SURROGATES[0]:
+            stack.append((_SURROGATES[1] + 1, hi))
+            stack.append((lo, _SURROGATES[0] - 1))
+            continue
+        split = False
+        for end in _ENCODED_LENGTH_ENDS:
+            if lo <= end < hi:
+                stack.append((end + 1, hi))
+                stack.append((lo, end))
+                split = True
+                break
+        if split:
+            continue
+        if hi <= 0x7F:
+            sequences.append(((lo, hi),))
+            continue
+        for i in range(1, 4):
+            # The code points sharing everything but their last i bytes
+            mask = (1 << 6 * i) - 1
+            if lo & ~mask == hi & ~mask:
+                continue
+            if lo & mask:
+                stack.append(((lo | mask) + 1, hi))
+                stack.append((lo, lo | mask))
+                split = True
+                break
+            if hi & mask != mask:
+                stack.append((hi & ~mask, hi))
+                stack.append((lo, (hi & ~mask) - 1))
+                split = True
+                break
+        if split:
+            continue
+        first, last = chr(lo).encode("utf-8"), chr(hi).encode("utf-8")
+        sequences.append(tuple(zip(first, last)))
+    return sequences
+
+
+def _to_utf8(nfa: _NFATables) -> Automata:
+    """An automata reading the UTF-8 encoding of what nfa reads, one byte a step.
+
+    Bytes are read as the code points 0 to 255. Every character edge becomes the
+    byte range sequences of its code points, through intermediate states that are
+    shared by all sequences ending with the same byte ranges into the same
+    targets, so common continuation bytes are only built once. Epsilon and end of
+    string edges are kept as they are.
+    """
+    states = [State() for _ in nfa.states]
+    intermediate: Dict[Tuple[ByteRanges, FrozenSet[int]], State] = {}
+
+    def continuation(ranges: ByteRanges, targets: FrozenSet[int]) -> State:
+        """The state from which ranges lead to targets"""
+        key = (ranges, targets)
+        state = intermediate.get(key)
+        if state is None:
+            state = intermediate[key] = State()
+            (lo, hi), rest = ranges[0], ranges[1:]
+            if rest:
+                state.transitions.add_range(lo, hi, {continuation(rest, targets)})
+            else:
+                state.transitions.add_range(lo, hi, {states[t] for t in targets})
+        return state
+
+    for q, state in enumerate(states):
+        transitions = state.transitions
+        transitions.epsilon.update(states[t] for t in nfa.epsilon[q])
+        transitions.end_of_string.update(states[t] for t in nfa.end_of_string[q])
+        for lo, hi, numbers in nfa.intervals[q]:
+            targets = frozenset(numbers)
+            for sequence in _utf8_sequences(lo, hi):
+                (first_lo, first_hi), rest = sequence[0], sequence[1:]
+                if rest:
+                    next_states = {continuation(rest, targets)}
+                else:
+                    next_states = {states[t] for t in targets}
+                transitions.add_range(first_lo, first_hi, next_states)
+
+    accepting = {states[q] for q in range(len(states)) if nfa.accepting_mask >> q & 1}
+    tags = None
+    if nfa.tags is not None:
+        tags = {states[q]: nfa.tags[q] for q in range(len(states)) if nfa.tags[q]}
+    return Automata(
+        states=set(states) | set(intermediate.values()),
+        start_state=states[0],
+        accepting_states=accepting,
+        tags=tags,
+    )
@@ -1,5 +1,11 @@
+from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Union
+from threading import Lock
+from typing import Any, Iterable, List, Tuple, Union
+from weakref import WeakValueDictionary
+
+# Largest code point a character can have, used for "any" and negated sets
+MAX_CODE_POINT = 0x10FFFF
 
 
 class Regex:
@@ -9,88 +15,224 @@ class Regex:
     Should be an ABC, but that causes problem with AstConstant inheriting from this class
     """
 
-    def __repr__(self):
-        vars = {
-            att_name: getattr(self, att_name)
-            for att_name in dir(self)
-            if not att_name.startswith("_")
-        }
+    __slots__ = ()
+
+
+_interned: "WeakValueDictionary[Tuple[Any, ...], _Interned]" = WeakValueDictionary()
+_interned_lock = Lock()
+
+
+class _Interned:
+    """Base class for immutable, hash-consed nodes.
+
+    Creating a node that is structurally equal to a live node returns that node,
+    so equality is identity and the structural hash is computed once, when the
+    node is created. This also lets identical subexpressions share one object.
+    """
+
+    __slots__ = ("_hash", "__weakref__")
+    _fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def _intern(cls, *values: Any):
+        key = (cls, *values)
+        with _interned_lock:
+            node = _interned.get(key)
+            if node is None:
+                node = object.__new__(cls)
+                for field, value in zip(cls._fields, values):
+                    object.__setattr__(node, field, value)
+                object.__setattr__(node, "_hash", hash(key))
+                _interned[key] = node
+        return node
+
+    def __hash__(self):
+        return self._hash
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
 
-        var_args = ", ".join(f"{att}={repr(val)}" for att, val in vars.items())
+    def __reduce__(self):
+        return self.__class__, tuple(getattr(self, field) for field in self._fields)
+
+    def __repr__(self):
+        var_args = ", ".join(
+            f"{field}={repr(getattr(self, field))}" for field in self._fields
+        )
         return f"{self.__class__.__name__}({var_args})"
 
-    def __eq__(self, other):
-        attrs = [attr for attr in dir(self) if not attr.startswith("_")]
 
-        def attr_same(attr):
-            return hasattr(self, attr) and getattr(self, attr) == getattr(other, attr)
+class Or(Regex, _Interned):
+    __slots__ = ("items",)
+    _fields = ("items",)
+    items: Tuple[Regex, ...]
 
-        return isinstance(other, self.__class__) and all(map(attr_same, attrs))
+    def __new__(cls, *items: Regex):
+        return cls._intern(items)
 
+    def __reduce__(self):
+        return self.__class__, self.items
 
-class Or(Regex):
-    def __init__(self, left: Regex, right: Regex):
-        self.left = left
-        self.right = right
 
+class Concat(Regex, _Interned):
+    __slots__ = ("items",)
+    _fields = ("items",)
+    items: Tuple[Regex, ...]
 
-class Concat(Regex):
-    def __init__(self, left: Regex, right: Regex):
-        self.left = left
-        self.right = right
+    def __new__(cls, *items: Regex):
+        return cls._intern(items)
 
+    def __reduce__(self):
+        return self.__class__, self.items
 
-class Kleene(Regex):
-    def __init__(self, r: Regex):
-        self.r = r
 
+class Kleene(Regex, _Interned):
+    __slots__ = ("r",)
+    _fields = ("r",)
+    r: Regex
 
-class Plus(Regex):
-    def __init__(self, r: Regex):
-        self.r = r
+    def __new__(cls, r: Regex):
+        return cls._intern(r)
 
 
-class Maybe(Regex):
-    def __init__(self, r: Regex):
-        self.r = r
+class Plus(Regex, _Interned):
+    __slots__ = ("r",)
+    _fields = ("r",)
+    r: Regex
 
+    def __new__(cls, r: Regex):
+        return cls._intern(r)
 
-class Group(Regex):
-    def __init__(self, r: Regex):
-        self.r = r
 
+class Maybe(Regex, _Interned):
+    __slots__ = ("r",)
+    _fields = ("r",)
+    r: Regex
 
-class Char(Regex):
-    def __init__(self, s: str):
-        self.s = s
+    def __new__(cls, r: Regex):
+        return cls._intern(r)
 
 
-class Range:
-    def __init__(self, start: Char, end: Char):
-        self.start = start
-        self.end = end
+class Group(Regex, _Interned):
+    __slots__ = ("r",)
+    _fields = ("r",)
+    r: Regex
 
-    def __eq__(self, other):
-        return all(
-            (
-                isinstance(other, Range),
-                self.start == other.start,
-                self.end == other.end,
-            )
-        )
+    def __new__(cls, r: Regex):
+        return cls._intern(r)
+
+
+class Char(Regex, _Interned):
+    __slots__ = ("s",)
+    _fields = ("s",)
+    s: str
 
+    def __new__(cls, s: str):
+        return cls._intern(s)
 
-class PosSet(Regex):
-    def __init__(self, items: List[Union[Char, Range]]):
-        self.items = items
 
+class Range(_Interned):
+    __slots__ = ("start", "end")
+    _fields = ("start", "end")
+    start: Char
+    end: Char
 
-class NegSet(Regex):
-    def __init__(self, items: List[Union[Char, Range]]):
-        self.items = items
+    def __new__(cls, start: Char, end: Char):
+        return cls._intern(start, end)
+
+
+def _normalize_items(
+    items: Iterable[Union[Char, Range]]
+) -> Tuple[Tuple[int, int], ...]:
+    """Sorts, deduplicates and coalesces set items into disjoint code point ranges.
+
+    Ranges that overlap or are adjacent are merged, so the result is the minimal
+    sorted list of inclusive (start, end) ranges covering the items.
+    """
+    bounds = sorted(
+        (ord(item.s), ord(item.s))
+        if isinstance(item, Char)
+        else (ord(item.start.s), ord(item.end.s))
+        for item in items
+    )
+    merged: List[List[int]] = []
+    for lo, hi in bounds:
+        if lo > hi:
+            continue
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return tuple((lo, hi) for lo, hi in merged)
+
+
+def _complement(ranges: Tuple[Tuple[int, int], ...]) -> Tuple[Tuple[int, int], ...]:
+    """The disjoint ranges of all code points not in the sorted, disjoint ranges"""
+    complement = []
+    start = 0
+    for lo, hi in ranges:
+        if start < lo:
+            complement.append((start, lo - 1))
+        start = hi + 1
+    if start <= MAX_CODE_POINT:
+        complement.append((start, MAX_CODE_POINT))
+    return tuple(complement)
+
+
+class _CharSet(Regex, _Interned, ABC):
+    __slots__ = ("items", "_ranges")
+    _fields = ("items",)
+    items: Tuple[Union[Char, Range], ...]
+    _ranges: Tuple[Tuple[int, int], ...]
+
+    def __new__(cls, items: Iterable[Union[Char, Range]]):
+        return cls._intern(tuple(items))
+
+    @property
+    def ranges(self) -> Tuple[Tuple[int, int], ...]:
+        """The matched code points as disjoint, sorted (start, end) ranges.
+
+        Computed once per set, since equal sets are the same node.
+        """
+        try:
+            return self._ranges
+        except AttributeError:
+            ranges = self._compute_ranges()
+            object.__setattr__(self, "_ranges", ranges)
+            return ranges
+
+    @abstractmethod
+    def _compute_ranges(self) -> Tuple[Tuple[int, int], ...]:
+        """The ranges, computed the first time they're needed"""
+
+
+class PosSet(_CharSet):
+    __slots__ = ()
+
+    def _compute_ranges(self) -> Tuple[Tuple[int, int], ...]:
+        return _normalize_items(self.items)
+
+
+class NegSet(_CharSet):
+    __slots__ = ()
+
+    def _compute_ranges(self) -> Tuple[Tuple[int, int], ...]:
+        # A handful of ranges around the items, however many characters they span
+        return _complement(_normalize_items(self.items))
 
 
 class AstConstant(Regex, Enum):
     any = 1
     end_of_string = 2
     epsilon = 3
+
+
+def _children(regex: Regex) -> Tuple[Regex, ...]:
+    if isinstance(regex, (Or, Concat)):
+        return regex.items
+    if isinstance(regex, (Kleene, Plus, Maybe, Group)):
+        return (regex.r,)
+    return ()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from itertools import product
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from re_automata.regex.AST import (
+    Regex,
+    Char,
+    Or,
+    Concat,
+    Plus,
+    Maybe,
+    Group,
+    PosSet,
+    AstConstant,
+    _children,
+)
+
+# Sets with more alternatives than this are given up on, and longer literals are
+# cut, so the analysis stays linear in the length of the pattern
+MAX_ALTERNATIVES = 16
+MAX_LENGTH = 64
+
+Alternatives = FrozenSet[str]
+
+
+class Literals(NamedTuple):
+    """Literals found in every match of a regex.
+
+    Every match is one of exact, starts with one of prefixes, ends with one of
+    suffixes and contains one of factors. Each is None when nothing is known.
+    Only exact may contain the empty string, and an empty set means that nothing
+    is matched at all. factors is the most selective set found, which may be the
+    prefixes or the suffixes.
+    """
+
+    exact: Optional[Alternatives]
+    prefixes: Optional[Alternatives]
+    suffixes: Optional[Alternatives]
+    factors: Optional[Alternatives]
+
+
+def literals(regex: Regex) -> Literals:
+    """The required literals of a regex, computed bottom up without recursion.
+
+    Equal subexpressions are the same node, so each is only analysed once.
+    """
+    done: Dict[Regex, Literals] = {}
+    stack: List[Tuple[Regex, bool]] = [(regex, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if node in done:
+            continue
+        children = _children(node)
+        if children and not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        done[node] = _combine(node, [done[child] for child in children])
+    return done[regex]
+
+
+def _combine(regex: Regex, inner: List[Literals]) -> Literals:
+    """The literals of regex from the literals of its children"""
+    if isinstance(regex, Char):
+        return _exactly(frozenset((regex.s,)))
+    if isinstance(regex, PosSet):
+        size = sum(hi - lo + 1 for lo, hi in regex.ranges)
+        if size > MAX_ALTERNATIVES:
+            return Literals(None, None, None, None)
+        return _exactly(
+            frozenset(chr(c) for lo, hi in regex.ranges for c in range(lo, hi + 1))
+        )
+    if regex in (AstConstant.end_of_string, AstConstant.epsilon):
+        return _exactly(frozenset(("",)))
+    if isinstance(regex, Group):
+        return inner[0]
+    if isinstance(regex, Maybe):
+        exact = inner[0].exact
+        return _exactly(None if exact is None else exact | {""})
+    if isinstance(regex, Plus):
+        # Matches at least once, so whatever r starts, ends or contains
+        _, prefixes, suffixes, factors = inner[0]
+        return Literals(None, prefixes, suffixes, factors)
+    if isinstance(regex, Or):
+        return _union(inner)
+    if isinstance(regex, Concat):
+        return _concat(inner)
+    # Kleene, any and negated sets
+    return Literals(None, None, None, None)
+
+
+def _exactly(exact: Optional[Alternatives]) -> Literals:
+    if exact is None:
+        return Literals(None, None, None, None)
+    required = _required(exact)
+    return Literals(exact, required, required, required)
+
+
+def _union(inner: List[Literals]) -> Literals:
+    def union(sets: Iterable[Optional[Alternatives]]) -> Optional[Alternatives]:
+        result: Alternatives = frozenset()
+        for alternatives in sets:
+            if alternatives is None:
+                return None
+            result |= alternatives
+            if len(result) > MAX_ALTERNATIVES:
+                return None
+        return result
+
+    exact = union(item.exact for item in inner)
+    if exact is not None:
+        return _exactly(exact)
+    prefixes = union(item.prefixes for item in inner)
+    suffixes = union(item.suffixes for item in inner)
+    factors = union(item.factors for item in inner)
+    return Literals(None, prefixes, suffixes, _best((prefixes, suffixes, factors)))
+
+
+def _concat(inner: List[Literals]) -> Literals:
+    exact: Optional[Alternatives] = frozenset(("",))
+    for item in inner:
+        exact = _cross(exact, item.exact, cut=False)
+        if exact is None:
+            break
+    if exact is not None:
+        return _exactly(exact)
+
+    prefixes = _affix(inner, _cross)
+    suffixes = _affix(
+        [item._replace(prefixes=item.suffixes) for item in reversed(inner)],
+        lambda a, b: _cross(b, a, keep_end=True),
+    )
+
+    # Runs of exact items, each with what ends the item before it and starts the
+    # item after it, are the inner factors
+    candidates = [prefixes, suffixes]
+    run: Optional[Alternatives] = frozenset(("",))
+    for item in inner:
+        if item.exact is not None:
+            longer = _cross(run, item.exact, keep_end=True)
+            run = item.exact if longer is None else longer
+        else:
+            candidates.append(_cross(run, item.prefixes))
+            candidates.append(item.factors)
+            run = item.suffixes if item.suffixes is not None else frozenset(("",))
+        candidates.append(run)
+    return Literals(None, prefixes, suffixes, _best(candidates))
+
+
+def _affix(inner: List[Literals], cross) -> Optional[Alternatives]:
+    """The prefixes of a concatenation, as far as its leading exact items reach"""
+    affix: Alternatives = frozenset(("",))
+    for item in inner:
+        if item.exact is not None:
+            longer = cross(affix, item.exact)
+            if longer is None:
+                break
+            affix = longer
+            if any(len(s) >= MAX_LENGTH for s in affix):
+                break
+            continue
+        longer = cross(affix, item.prefixes)
+        if longer is not None:
+            affix = longer
+        break
+    return _required(affix)
+
+
+def _cross(
+    left: Optional[Alternatives],
+    right: Optional[Alternatives],
+    keep_end=False,
+    cut=True,
+) -> Optional[Alternatives]:
+    """Every concatenation of a left and a right string, cut to MAX_LENGTH
+    characters from the start or with keep_end from the end. Without cut None is
+    returned for concatenations longer than that instead.
+    """
+    if left is None or right is None or len(left) * len(right) > MAX_ALTERNATIVES:
+        return None
+    if not cut:
+        crossed = frozenset(a + b for a, b in product(left, right))
+        if any(len(s) > MAX_LENGTH for s in crossed):
+            return None
+        return crossed
+    if keep_end:
+        return frozenset((a + b)[-MAX_LENGTH:] for a, b in product(left, right))
+    return frozenset((a + b)[:MAX_LENGTH] for a, b in product(left, right))
+
+
+def _required(alternatives: Optional[Alternatives]) -> Optional[Alternatives]:
+    """None when one of the alternatives is empty, since it's then not required"""
+    if alternatives is None or "" in alternatives:
+        return None
+    return alternatives
+
+
+def _best(candidates: Iterable[Optional[Alternatives]]) -> Optional[Alternatives]:
+    """The most selective set: longest shortest literal, then fewest alternatives"""
+    best = None
+    best_score = None
+    for alternatives in candidates:
+        alternatives = _required(alternatives)
+        if alternatives is None:
+            continue
+        if not alternatives:
+            return alternatives
+        score = (min(len(s) for s in alternatives), -len(alternatives))
+        if best_score is None or score > best_score:
+            best, best_score = alternatives, score
+    return best
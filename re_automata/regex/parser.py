@@ -1,4 +1,4 @@
-from typing import Union, List
+from typing import Union, List, Tuple
 
 from re_automata.regex.AST import (
     Char,
@@ -15,8 +15,10 @@ from re_automata.regex.AST import (
     AstConstant,
 )
 from re_automata.regex.tokens import META_CHARACTERS, _Lexer
+from re_automata.stats import _traced
 
 
+@_traced("parse")
 def from_string(s: str) -> Regex:
     lexer = _Lexer(s)
     return _parse_re(lexer)
@@ -41,24 +43,51 @@ def _parse_char(l: _Lexer, in_set=False) -> Char:
 
 
 def _parse_re(l: _Lexer) -> Regex:
-    word = _parse_word(l)
-    if l.peek() is None or l.peek() == ")":
-        return word
-    if l.peek() != "|":
-        raise ValueError(f'Expected "|" at {l.i}.')
-    l.consume("|")
-    return Or(word, _parse_re(l))
+    """Parses a whole regex without recursing into groups.
+
+    Nested groups are kept on an explicit stack, each entry holding the finished
+    alternatives and the parts of the current alternative of an enclosing group.
+    Alternatives and parts are collected into flat Or and Concat nodes.
+    """
+    stack: List[Tuple[List[Regex], List[Regex]]] = []
+    alternatives: List[Regex] = []
+    parts: List[Regex] = []
+    while True:
+        c = l.peek()
+        if c == "(":
+            l.consume("(")
+            stack.append((alternatives, parts))
+            alternatives, parts = [], []
+            continue
+        if c not in ("|", ")", None):
+            parts.append(_parse_part(l, _parse_atom(l)))
+            continue
 
+        if not parts:
+            if c is None:
+                raise ValueError("Reached end of string, expected more.")
+            raise ValueError(
+                f'Found "{c}" at {l.i}. The character is not valid in this context'
+            )
+        alternatives.append(parts[0] if len(parts) == 1 else Concat(*parts))
+        if c == "|":
+            l.consume("|")
+            parts = []
+            continue
 
-def _parse_word(l: _Lexer) -> Regex:
-    part = _parse_part(l)
-    if l.peek() in ("|", ")") or l.peek() is None:
-        return part
-    return Concat(part, _parse_word(l))
+        re = alternatives[0] if len(alternatives) == 1 else Or(*alternatives)
+        if c is None:
+            if stack:
+                raise ValueError('Reached end of string, expected ")".')
+            return re
+        if not stack:
+            raise ValueError(f'Found ")" at {l.i} without a matching "(".')
+        l.consume(")")
+        alternatives, parts = stack.pop()
+        parts.append(_parse_part(l, Group(re)))
 
 
-def _parse_part(l: _Lexer) -> Regex:
-    atom = _parse_atom(l)
+def _parse_part(l: _Lexer, atom: Regex) -> Regex:
     if l.peek() == "*":
         l.consume("*")
         return Kleene(atom)
@@ -74,8 +103,6 @@ def _parse_part(l: _Lexer) -> Regex:
 def _parse_atom(l: _Lexer) -> Regex:
     if l.peek() is None:
         raise ValueError("Reached end of string, expected more.")
-    if l.peek() == "(":
-        return _parse_group(l)
     if l.peek() == "[":
         return _parse_set(l)
     if l.peek() == ".":
@@ -87,13 +114,6 @@ def _parse_atom(l: _Lexer) -> Regex:
     return _parse_char(l)
 
 
-def _parse_group(l: _Lexer) -> Group:
-    l.consume("(")
-    re = _parse_re(l)
-    l.consume(")")
-    return Group(re)
-
-
 def _parse_set(l: _Lexer) -> Union[PosSet, NegSet]:
     l.consume("[")
     if l.peek() == "^":
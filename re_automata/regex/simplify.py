@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple, Union
+
+from re_automata.regex.AST import (
+    Regex,
+    Char,
+    Or,
+    Concat,
+    Kleene,
+    Plus,
+    Maybe,
+    Group,
+    PosSet,
+    Range,
+    AstConstant,
+    _children,
+    _normalize_items,
+)
+from re_automata.stats import _traced
+
+# The repetitions of a repetition of r, as the single repetition they equal
+_REPEAT = {
+    (Kleene, Kleene): Kleene,
+    (Kleene, Plus): Kleene,
+    (Kleene, Maybe): Kleene,
+    (Plus, Kleene): Kleene,
+    (Plus, Plus): Plus,
+    (Plus, Maybe): Kleene,
+    (Maybe, Kleene): Kleene,
+    (Maybe, Plus): Kleene,
+    (Maybe, Maybe): Maybe,
+}
+
+
+@_traced("simplify")
+def simplify(regex: Regex) -> Regex:
+    """Rewrites a regex into a smaller one matching the same strings.
+
+    Groups are removed and nested Concat and Or nodes flattened. Alternatives
+    with a common prefix or suffix are factored, so "foobar|foobaz" becomes
+    "fooba[rz]", single characters among alternatives are merged into one set,
+    and repetitions of repetitions like "(x*)*" or "(x+)?" become one.
+    The AST is walked in post-order without recursion, and equal subexpressions
+    are only simplified once.
+    """
+    done: Dict[Regex, Regex] = {}
+    stack: List[Tuple[Regex, bool]] = [(regex, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if node in done:
+            continue
+        children = _children(node)
+        if children and not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        done[node] = _rewrite(node, [done[child] for child in children])
+    return done[regex]
+
+
+def _rewrite(regex: Regex, inner: List[Regex]) -> Regex:
+    """The simplified regex from the already simplified children of regex"""
+    if isinstance(regex, Group):
+        return inner[0]
+    if isinstance(regex, Concat):
+        return _concat([item for r in inner for item in _sequence(r)])
+    if isinstance(regex, Or):
+        alternatives: List[Regex] = []
+        for r in inner:
+            alternatives.extend(r.items if isinstance(r, Or) else (r,))
+        return _factor([_sequence(r) for r in alternatives])
+    if isinstance(regex, (Kleene, Plus, Maybe)):
+        (r,) = inner
+        if r is AstConstant.epsilon:
+            return r
+        repeat = _REPEAT.get((type(regex), type(r)))
+        if repeat is not None and isinstance(r, (Kleene, Plus, Maybe)):
+            return repeat(r.r)
+        return type(regex)(r)
+    return regex
+
+
+def _sequence(regex: Regex) -> Tuple[Regex, ...]:
+    """The items of a flat Concat, or the regex alone"""
+    if isinstance(regex, Concat):
+        return regex.items
+    if regex is AstConstant.epsilon:
+        return ()
+    return (regex,)
+
+
+def _concat(items: List[Regex]) -> Regex:
+    if not items:
+        return AstConstant.epsilon
+    if len(items) == 1:
+        return items[0]
+    return Concat(*items)
+
+
+class _Trie:
+    __slots__ = ("children", "end")
+
+    def __init__(self):
+        self.children: Dict[Regex, _Trie] = {}
+        self.end = False
+
+
+def _factor(alternatives: List[Tuple[Regex, ...]]) -> Regex:
+    """The alternation of sequences, with common prefixes factored out.
+
+    The sequences are put in a trie and every branching node becomes an
+    alternation, built bottom up without recursion. Chains of nodes with a single
+    child are collected into one Concat.
+    """
+    root = _Trie()
+    for sequence in alternatives:
+        node = root
+        for item in sequence:
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = _Trie()
+            node = child
+        node.end = True
+
+    def branches(node: _Trie) -> List[Tuple[List[Regex], _Trie]]:
+        result = []
+        for item, child in node.children.items():
+            path = [item]
+            while not child.end and len(child.children) == 1:
+                ((item, child),) = child.children.items()
+                path.append(item)
+            result.append((path, child))
+        return result
+
+    built: Dict[_Trie, Regex] = {}
+    stack: List[Tuple[_Trie, bool]] = [(root, False)]
+    while stack:
+        node, children_built = stack.pop()
+        if not children_built:
+            stack.append((node, True))
+            stack.extend((child, False) for _, child in branches(node))
+            continue
+        sequences = [
+            (*path, *_sequence(built[child])) for path, child in branches(node)
+        ]
+        if node.end:
+            sequences.append(())
+        built[node] = _alternation(sequences)
+    return built[root]
+
+
+def _alternation(sequences: List[Tuple[Regex, ...]]) -> Regex:
+    """The alternation of sequences without a common prefix.
+
+    A common suffix is factored out, single characters are merged into one set
+    and an empty alternative makes the rest optional.
+    """
+    if len(sequences) == 1:
+        return _concat(list(sequences[0]))
+
+    shortest = min(len(sequence) for sequence in sequences)
+    k = 0
+    while k < shortest and all(
+        sequence[-1 - k] is sequences[0][-1 - k] for sequence in sequences
+    ):
+        k += 1
+    suffix = list(sequences[0][len(sequences[0]) - k :])
+
+    optional = False
+    characters: Optional[List[Union[Char, Range]]] = None
+    alternatives: List[Regex] = []
+    for sequence in sequences:
+        rest = sequence[: len(sequence) - k]
+        if not rest:
+            optional = True
+        elif len(rest) == 1 and isinstance(rest[0], (Char, PosSet)):
+            if characters is None:
+                characters = []
+            item = rest[0]
+            if isinstance(item, PosSet):
+                characters.extend(item.items)
+            else:
+                characters.append(item)
+        else:
+            alternatives.append(_concat(list(rest)))
+    if characters is not None:
+        alternatives.insert(0, _characters(characters))
+
+    choice: Regex
+    if not alternatives:
+        choice = AstConstant.epsilon
+    elif len(alternatives) == 1:
+        choice = alternatives[0]
+    else:
+        choice = Or(*alternatives)
+    if optional:
+        choice = _rewrite(Maybe(choice), [choice])
+    return _concat([*_sequence(choice), *suffix])
+
+
+def _characters(items: List[Union[Char, Range]]) -> Regex:
+    """A single Char or a PosSet of the normalized items"""
+    ranges = _normalize_items(items)
+    if len(ranges) == 1 and ranges[0][0] == ranges[0][1]:
+        return Char(chr(ranges[0][0]))
+    return PosSet(
+        Char(chr(lo)) if lo == hi else Range(Char(chr(lo)), Char(chr(hi)))
+        for lo, hi in ranges
+    )
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Called with the name, seconds and counts of every phase as it ends
+Callback = Callable[[str, float, Dict[str, int]], None]
+
+
+class Phase:
+    """The totals of every call of one phase of building an automata.
+
+    Counts named peak_* keep their largest value, other counts are summed.
+    """
+
+    __slots__ = ("calls", "seconds", "counts")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.counts: Dict[str, int] = {}
+
+    def add(self, counts: Dict[str, int]):
+        for name, value in counts.items():
+            if name.startswith("peak_"):
+                self.counts[name] = max(self.counts.get(name, value), value)
+            else:
+                self.counts[name] = self.counts.get(name, 0) + value
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "seconds": self.seconds, **self.counts}
+
+    def __repr__(self):
+        return f"Phase({self.as_dict()})"
+
+
+class Stats:
+    """Statistics collected by collect_stats, by phase"""
+
+    def __init__(self, callback: Optional[Callback] = None):
+        self.callback = callback
+        self.phases: Dict[str, Phase] = {}
+
+    def record(self, name: str, seconds: float = 0.0, calls: int = 1, **counts: int):
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase()
+        phase.calls += calls
+        phase.seconds += seconds
+        phase.add(counts)
+        if self.callback is not None:
+            self.callback(name, seconds, counts)
+
+    def count(self, name: str, **counts: int):
+        """Adds to the counts of a phase without counting a call"""
+        self.record(name, calls=0, **counts)
+
+    @property
+    def cache_hit_rate(self) -> Optional[float]:
+        cache = self.phases.get("cache")
+        if cache is None:
+            return None
+        hits = cache.counts.get("hits", 0)
+        return hits / (hits + cache.counts.get("misses", 0))
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: phase.as_dict() for name, phase in self.phases.items()}
+
+    def __repr__(self):
+        return f"Stats({self.as_dict()})"
+
+
+_current: ContextVar[Optional[Stats]] = ContextVar("re_automata_stats", default=None)
+
+
+def current_stats() -> Optional[Stats]:
+    """The Stats being collected in this context, or None"""
+    return _current.get()
+
+
+@contextmanager
+def collect_stats(callback: Optional[Callback] = None) -> Iterator[Stats]:
+    """Collects statistics of everything built in the with block.
+
+    Phases report their wall time and sizes, like the states and transitions
+    of the automata built, the largest set of NFA states in a DFA state and the
+    hits and misses of the compile cache. callback is also called as each phase
+    ends. Outside of the block nothing is measured.
+    """
+    stats = Stats(callback)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _traced(name: str, describe: Optional[Callable[[Any], Dict[str, int]]] = None):
+    """Decorates a phase to be timed while stats are collected.
+
+    describe gives the counts to record from the phase's result. When no stats
+    are collected only the context lookup is added to the call.
+    """
+
+    def decorator(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            stats = _current.get()
+            if stats is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            stats.record(name, seconds, **(describe(result) if describe else {}))
+            return result
+
+        return wrapper  # type: ignore
+
+    return decorator
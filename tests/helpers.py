@@ -0,0 +1,26 @@
+import random
+import re
+
+
+def random_texts(alphabet, n, max_len, seed=0):
+    """n reproducible random strings of up to max_len characters from alphabet"""
+    rand = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rand.choice(alphabet) for _ in range(rand.randint(0, max_len)))
+
+
+def longest_match(regex, text):
+    """The span of the longest match of regex at the start of text, with re"""
+    for end in range(len(text), -1, -1):
+        if re.fullmatch(regex, text[:end], re.DOTALL):
+            return 0, end
+    return None
+
+
+def leftmost_longest(regex, text):
+    """The span of the leftmost-longest match of regex in text, with re"""
+    for start in range(len(text) + 1):
+        for end in range(len(text), start - 1, -1):
+            if re.fullmatch(regex, text[start:end], re.DOTALL):
+                return start, end
+    return None
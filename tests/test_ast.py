@@ -0,0 +1,64 @@
+import pickle
+
+import pytest
+
+from re_automata.regex import from_string
+from re_automata.regex.AST import Char, Concat, Or, PosSet, Range
+
+
+def test_equal_nodes_are_identical():
+    assert Char("a") is Char("a")
+    assert Concat(Char("a"), Char("b")) is from_string("ab")
+    assert PosSet([Range(Char("a"), Char("z"))]) is from_string("[a-z]")
+    assert Char("a") is not Char("b")
+
+
+def test_shared_subexpressions():
+    regex = from_string("abc|abc")
+    assert isinstance(regex, Or)
+    left, right = regex.items
+    assert left is right
+
+
+def test_hashable():
+    memo = {from_string("(a|b)*c"): 1}
+    assert memo[from_string("(a|b)*c")] == 1
+    assert hash(Char("x")) == hash(Char("x"))
+
+
+def test_immutable():
+    with pytest.raises(AttributeError):
+        Char("a").s = "b"
+    with pytest.raises(AttributeError):
+        del from_string("ab").items
+
+
+def test_pickle_keeps_identity():
+    regex = from_string("a(b|[c-d])*")
+    assert pickle.loads(pickle.dumps(regex)) is regex
+
+
+@pytest.mark.parametrize(
+    "regex, ranges",
+    (
+        ("[a]", ((97, 97),)),
+        ("[cba]", ((97, 99),)),
+        ("[a-fd-kx]", ((97, 107), (120, 120))),
+        ("[a-zA-Z0-9_\\-.]", ((45, 46), (48, 57), (65, 90), (95, 95), (97, 122))),
+        ("[aa-a]", ((97, 97),)),
+    ),
+)
+def test_posset_ranges(regex, ranges):
+    assert from_string(regex).ranges == ranges
+
+
+@pytest.mark.parametrize(
+    "regex, ranges",
+    (
+        ("[^a]", ((0, 96), (98, 0x10FFFF))),
+        ("[^\x00-a]", ((98, 0x10FFFF),)),
+        ("[^a-zb]", ((0, 96), (123, 0x10FFFF))),
+    ),
+)
+def test_negset_ranges(regex, ranges):
+    assert from_string(regex).ranges == ranges
@@ -0,0 +1,40 @@
+import pytest
+
+from helpers import random_texts
+from re_automata.finite_automata import compiled_dfa_from_string
+
+np = pytest.importorskip("numpy")
+
+PATTERNS = (
+    ("(a|b)*abb", "ab"),
+    ("[A-Z][0-9]+|ሴ$", "AZ09aሴ"),
+    ("[^a]b*", "abc\x00"),
+)
+
+
+@pytest.mark.parametrize("regex, alphabet", PATTERNS)
+def test_agrees_with_fullmatch(regex, alphabet):
+    dfa = compiled_dfa_from_string(regex)
+    texts = list(random_texts(alphabet, n=200, max_len=10, seed=5))
+    result = dfa.match_many(texts)
+    assert result.dtype == np.bool_
+    assert result.tolist() == [dfa.fullmatch(text) for text in texts]
+
+
+def test_empty_batch():
+    dfa = compiled_dfa_from_string("a")
+    assert dfa.match_many([]).tolist() == []
+    assert dfa.match_many(["", ""]).tolist() == [False, False]
+
+
+def test_lone_surrogates():
+    dfa = compiled_dfa_from_string("[^a]+")
+    texts = ["\ud800", "x\udfffy", "a\ud800"]
+    assert dfa.match_many(texts).tolist() == [dfa.fullmatch(text) for text in texts]
+
+
+def test_one_long_string_among_short_ones():
+    dfa = compiled_dfa_from_string("(ab)*c?")
+    texts = ["ab" * 50_000 + "c", "ab" * 50_000 + "b"]
+    texts += random_texts("abc", n=100, max_len=6, seed=3)
+    assert dfa.match_many(texts).tolist() == [dfa.fullmatch(text) for text in texts]
@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from re_automata.finite_automata import (
+    CompileCache,
+    compile_cache,
+    dfa_from_string,
+    nfa_from_string,
+)
+
+
+def test_lru_eviction():
+    cache = CompileCache(maxsize=2)
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    cache.get("a", lambda: 3)
+    cache.get("c", lambda: 4)
+    # "b" was the least recently used
+    assert cache.get("a", lambda: 5) == 1
+    assert cache.get("b", lambda: 6) == 6
+    info = cache.info()
+    assert (info.hits, info.misses, info.evictions) == (2, 4, 2)
+    assert info.currsize == 2
+
+
+def test_shrinking_evicts():
+    cache = CompileCache(maxsize=3)
+    for key in "abc":
+        cache.get(key, lambda: key)
+    cache.maxsize = 1
+    assert cache.info().currsize == 1
+    assert cache.info().evictions == 2
+
+
+def test_disabled():
+    cache = CompileCache(maxsize=0)
+    assert cache.get("a", lambda: 1) == 1
+    assert cache.get("a", lambda: 2) == 2
+    assert cache.info().currsize == 0
+
+
+def test_negative_size():
+    with pytest.raises(ValueError):
+        CompileCache(maxsize=-1)
+
+
+def test_purge():
+    cache = CompileCache()
+    cache.get("a", lambda: 1)
+    cache.purge()
+    assert cache.info() == (0, 0, 0, cache.maxsize, 0)
+    assert cache.get("a", lambda: 2) == 2
+
+
+def test_threads_share_one_value():
+    cache = CompileCache()
+    with ThreadPoolExecutor(8) as pool:
+        values = list(pool.map(lambda _: cache.get("a", object), range(100)))
+    assert all(value is values[0] for value in values)
+
+
+def test_from_string_is_cached():
+    compile_cache.purge()
+    assert nfa_from_string("ab|c") is nfa_from_string("ab|c")
+    assert dfa_from_string("ab|c") is not nfa_from_string("ab|c")
+    info = compile_cache.info()
+    assert (info.hits, info.misses) == (2, 3)
@@ -0,0 +1,69 @@
+import pytest
+
+from helpers import random_texts
+from re_automata.finite_automata import (
+    compiled_dfa_from_string,
+    matcher_from_string,
+    nfa_from_string,
+)
+
+PATTERNS = (
+    ("(a|b)*abb", "ab"),
+    ("[a-c]+d?|x$", "abcdx"),
+    ("(ab)?c+", "abc"),
+    ("abcab|abd", "abcd"),
+    ("[^a]b*|ሴ+", "abሴ\x00"),
+    ("a.c|$", "abc\n"),
+)
+
+
+@pytest.mark.parametrize("regex, alphabet", PATTERNS)
+def test_agrees_with_dfa(regex, alphabet):
+    dfa = compiled_dfa_from_string(regex)
+    nfa = nfa_from_string(regex)
+    fullmatch = matcher_from_string(regex)
+    match = matcher_from_string(regex, mode="match")
+    for text in random_texts(alphabet, n=80, max_len=12, seed=11):
+        assert fullmatch(text) == dfa.fullmatch(text), text
+        span = nfa.match(text)
+        assert match(text) == (span and span[1]), text
+
+
+def test_literal_runs_use_startswith():
+    source = matcher_from_string("x[0-9]+error code").__source__
+    assert "text.startswith('error code', i)" in source
+    # The digits are scanned by a regex, and every state has only one way in,
+    # so all blocks are nested in the one of the start without any dispatch
+    assert "_re.compile('[\\\\x30-\\\\x39]*')" in source
+    assert "state" not in source
+
+
+@pytest.mark.parametrize(
+    "regex, alphabet",
+    (
+        # Deeper than blocks are nested
+        ("[ab]" * 40 + "c", "abc"),
+        (
+            "(" + "|".join(f"{w}[0-9]*" for w in ("ab", "ba", "abc", "cab")) + ")+",
+            "abc0",
+        ),
+        ("([a-z]|[A-Z]|[0-9]|_|-)+", "aZ_-!"),
+    ),
+)
+def test_dispatched_states(regex, alphabet):
+    dfa = compiled_dfa_from_string(regex)
+    fullmatch = dfa.codegen()
+    match = dfa.codegen("match")
+    nfa = nfa_from_string(regex)
+    texts = list(random_texts(alphabet, n=200, max_len=45, seed=2))
+    texts.append("a" * 40 + "c")
+    for text in texts:
+        assert fullmatch(text) == dfa.fullmatch(text), text
+        span = nfa.match(text)
+        assert match(text) == (span and span[1]), text
+
+
+def test_cached_and_validated():
+    assert matcher_from_string("ab") is matcher_from_string("ab")
+    with pytest.raises(ValueError):
+        compiled_dfa_from_string("ab").codegen(mode="search")
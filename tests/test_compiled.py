@@ -0,0 +1,42 @@
+import re
+from array import array
+
+import pytest
+
+from re_automata.finite_automata import compiled_dfa_from_string
+
+PATTERNS = (
+    "a",
+    "abc|abd",
+    "(a|b)*abb",
+    "[a-z]+x|[a-c]y",
+    "a.c",
+    "(ab)?c+",
+    "19|20",
+    "a$",
+    "[0-9]+(\\.[0-9]*)?",
+)
+TEXTS = ("", "a", "ab", "abb", "abab", "abd", "ax", "cy", "abc", "a\nc", "c", "abccc")
+TEXTS += ("ccc", "19", "20", "192", "3.14", "42", "4.", ".5", "aaabb", "zzzx", "åäö")
+
+
+@pytest.mark.parametrize("regex", PATTERNS)
+def test_fullmatch_agrees_with_re(regex):
+    dfa = compiled_dfa_from_string(regex)
+    for text in TEXTS:
+        expected = re.fullmatch(regex, text, re.DOTALL) is not None
+        assert dfa.fullmatch(text) == expected, text
+
+
+def test_classes_are_merged():
+    dfa = compiled_dfa_from_string("(a|b)*abb")
+    # Everything but "a" and "b" behaves the same
+    assert dfa.nclasses == 3
+    assert dfa.nstates == 4
+    assert dfa.class_of(ord("c")) == dfa.class_of(ord("ሴ")) == dfa.class_of(0)
+    assert isinstance(dfa.table, array)
+    assert len(dfa.table) == dfa.nstates * dfa.nclasses
+
+
+def test_pattern_is_kept():
+    assert compiled_dfa_from_string("a|b").pattern == "a|b"
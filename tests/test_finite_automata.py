@@ -1,13 +1,28 @@
+import itertools
+import re
+
 import pytest
 
-from re_automata.finite_automata import nfa_from_string
-from re_automata.finite_automata.transition_tree import _less_than
+from re_automata.finite_automata import dfa_from_string, nfa_from_string
+from re_automata.finite_automata.automata import Automata, State, _nfa_step
+from re_automata.finite_automata.transition_map import TransitionMap
+from re_automata.regex import from_string
 from re_automata.regex.AST import (
     Char,
     Range,
     AstConstant,
 )
 
+NESTED_QUANTIFIERS = (
+    "(ab+)?",
+    "((a)+(a)+)*",
+    "(é(b)*)?",
+    "(a*b?)+c",
+    "((ab)?c)*",
+    "(a?)+b",
+    "(a+|b)*a?",
+)
+
 
 @pytest.mark.parametrize(
     "regex, states",
@@ -18,10 +33,10 @@ from re_automata.regex.AST import (
         ("[abc]", 2),
         ("[^abc]", 2),
         ("(a)", 2),
-        ("a*", 3),
-        ("a+", 2),
-        ("a?", 2),
-        ("a|b", 6),
+        ("a*", 4),
+        ("a+", 4),
+        ("a?", 4),
+        ("a|b", 2),
         ("ab", 4),
         ("19|20", 10),
     ),
@@ -31,37 +46,197 @@ def test_nr_states(regex, states):
 
 
 @pytest.mark.parametrize(
-    "a,b",
+    "regex, states",
     (
-        (Char("a"), Char("b")),
-        (AstConstant.epsilon, Char(chr(0))),
-        (AstConstant.epsilon, Range(Char("a"), Char("c"))),
-        (AstConstant.any, AstConstant.end_of_string),
-        (AstConstant.any, AstConstant.epsilon),
-        (AstConstant.end_of_string, AstConstant.epsilon),
-        (Range(Char("a"), Char("f")), Range(Char("g"), Char("m"))),
+        ("a", 2),
+        ("[^abc]", 2),
+        ("a*", 2),
+        ("a|b", 2),
+        ("19|20", 5),
+        ("(a|b)*abb", 5),
+        ("(a|b)?c+$", 4),
     ),
 )
-def test_less_than(a, b):
-    assert _less_than(a, b)
+def test_glushkov_nr_states(regex, states):
+    nfa = nfa_from_string(regex, mode="glushkov")
+    assert len(nfa.states) == states
+    assert not any(state.transitions.epsilon for state in nfa.states)
+
+
+@pytest.mark.parametrize(
+    "regex",
+    (
+        "a",
+        "a*b?",
+        "(a|b)*abb",
+        "(ab|a)(c|bc)",
+        "((a*)*|b)+c",
+        "x$|y",
+        "(ab+)?",
+        "((a)+(a)+)*",
+        "(a*b?)+c",
+    ),
+)
+@pytest.mark.parametrize(
+    "text", ("", "a", "b", "ab", "abb", "abc", "aabbc", "aaa", "c", "x", "y")
+)
+def test_glushkov_agrees_with_thompson(regex, text):
+    thompson = nfa_from_string(regex)
+    glushkov = nfa_from_string(regex, mode="glushkov")
+    assert glushkov.fullmatch(text) == thompson.fullmatch(text)
+    assert glushkov.search(text) == thompson.search(text)
+
+
+@pytest.mark.parametrize(
+    "regex, states",
+    (("a*", 2), ("19|20", 5), ("(a|b)*abb", 5), ("((a*)*|b)+c", 4), ("a|$", 3)),
+)
+def test_remove_epsilons(regex, states):
+    nfa = nfa_from_string(regex)
+    epsilon_free = nfa.remove_epsilons()
+    assert len(epsilon_free.states) == states
+    assert not any(state.transitions.epsilon for state in epsilon_free.states)
+    for text in ("", "a", "aa", "abb", "babb", "19", "20", "bc", "ac", "c"):
+        assert epsilon_free.fullmatch(text) == nfa.fullmatch(text)
+
+
+@pytest.mark.parametrize("regex", NESTED_QUANTIFIERS)
+def test_remove_epsilons_nested_quantifiers(regex):
+    epsilon_free = nfa_from_string(regex).remove_epsilons()
+    for n in range(5):
+        for chars in itertools.product("abcé", repeat=n):
+            text = "".join(chars)
+            assert epsilon_free.fullmatch(text) == bool(re.fullmatch(regex, text))
+
+
+def test_remove_epsilons_prunes_useless_states():
+    start, accepting, useless, unreachable = State(), State(), State(), State()
+    start.add_transition(AstConstant.epsilon, useless)
+    start.add_transition(Char("a"), accepting)
+    useless.add_transition(Char("b"), useless)
+    unreachable.add_transition(Char("c"), accepting)
+    nfa = Automata({start, accepting, useless, unreachable}, start, {accepting})
+    epsilon_free = nfa.remove_epsilons()
+    assert len(epsilon_free.states) == 2
+    assert epsilon_free.fullmatch("a")
+    assert not epsilon_free.fullmatch("b")
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        nfa_from_string("a", mode="brzozowski")
+
+
+def test_long_patterns():
+    assert nfa_from_string("a" * 5000).fullmatch("a" * 5000)
+    alternation = nfa_from_string("|".join(f"k{i}" for i in range(2000)))
+    assert alternation.fullmatch("k1999")
+    assert not alternation.fullmatch("k2000")
+
+
+def test_deeply_nested_quantifiers():
+    # Built from the unsimplified AST, so every quantifier gets its own states
+    nested = _nfa_step(from_string("(" * 1000 + "ab" + ")?" * 500 + ")+" * 500))
+    assert nested.fullmatch("")
+    assert nested.fullmatch("abab")
+    assert not nested.fullmatch("b")
+    assert not nested.fullmatch("aab")
 
 
 @pytest.mark.parametrize(
-    "a,b",
+    "regex, states, accepting",
     (
-        (Char("a"), Char("a")),
-        (AstConstant.epsilon, AstConstant.epsilon),
-        (Range(Char("a"), Char("f")), Range(Char("a"), Char("f"))),
-        (Range(Char("a"), Char("f")), Range(Char("f"), Char("m"))),
-        (Range(Char("a"), Char("z")), Range(Char("f"), Char("m"))),
-        (Range(Char("a"), Char("f")), Range(Char("f"), Char("m"))),
-        (Range(Char("a"), Char("f")), Char("d")),
+        ("a", 2, 1),
+        ("a|b", 2, 1),
+        ("[a-c]|[b-d]", 2, 1),
+        ("a*", 1, 1),
+        ("(a|aa)*", 1, 1),
+        ("abc|abd", 4, 1),
+        ("19|20", 4, 1),
+        ("(a|b)*abb", 4, 1),
+        ("(a|b)*a(a|b)", 4, 2),
+        # The end of string edge needs an extra accepting state
+        ("a$", 3, 1),
+        ("a$b", 1, 0),
     ),
 )
-def test_ish_equal(a, b):
-    """Equal in the sense that neither a < b or b < a.
+def test_minimized_nr_states(regex, states, accepting):
+    dfa = dfa_from_string(regex)
+    assert len(dfa.states) == states
+    assert len(dfa.accepting_states) == accepting
+
+
+@pytest.mark.parametrize("regex", ("a|b", "(a|b)*abb", "[a-z]|[d-f]x", ".|a"))
+def test_minimized_is_deterministic(regex):
+    for state in dfa_from_string(regex).states:
+        assert all(len(targets) == 1 for _, targets in state.transitions)
+
+
+@pytest.mark.parametrize("regex", NESTED_QUANTIFIERS)
+def test_nested_quantifiers(regex):
+    nfa = nfa_from_string(regex)
+    dfa = nfa.minimize()
+    for n in range(6):
+        for chars in itertools.product("abcé", repeat=n):
+            text = "".join(chars)
+            expected = bool(re.fullmatch(regex, text))
+            assert nfa.fullmatch(text) == expected, text
+            assert dfa.fullmatch(text) == expected, text
+
+
+def test_transition_map_splits_overlaps():
+    s1, s2, s3 = State(), State(), State()
+    transitions = TransitionMap()
+    transitions.add(Range(Char("a"), Char("f")), {s1})
+    transitions.add(Range(Char("d"), Char("k")), {s2})
+    transitions.add(Char("e"), {s3})
+    assert list(transitions) == [
+        (Range(Char("a"), Char("c")), {s1}),
+        (Char("d"), {s1, s2}),
+        (Char("e"), {s1, s2, s3}),
+        (Char("f"), {s1, s2}),
+        (Range(Char("g"), Char("k")), {s2}),
+    ]
+    assert transitions.lookup(ord("e")) == {s1, s2, s3}
+    assert transitions.lookup(ord("z")) == set()
+
+
+def test_transition_map_fills_gaps():
+    s1, s2 = State(), State()
+    transitions = TransitionMap()
+    transitions.add(Char("b"), {s1})
+    transitions.add(Char("d"), {s1})
+    transitions.add(Range(Char("a"), Char("e")), {s2})
+    assert [(lo, hi) for lo, hi, _ in transitions.intervals()] == [
+        (ord(c), ord(c)) for c in "abcde"
+    ]
+    assert transitions.lookup(ord("c")) == {s2}
+    assert transitions.lookup(ord("d")) == {s1, s2}
+
+
+def test_transition_map_remove():
+    s1, s2 = State(), State()
+    transitions = TransitionMap()
+    transitions.add(Range(Char("a"), Char("z")), {s1})
+    transitions.add(AstConstant.epsilon, {s2})
+    transitions.remove(Range(Char("c"), Char("x")))
+    transitions.remove(AstConstant.epsilon)
+    assert list(transitions) == [
+        (Range(Char("a"), Char("b")), {s1}),
+        (Range(Char("y"), Char("z")), {s1}),
+    ]
+
+
+def test_transition_map_constants():
+    s1, s2 = State(), State()
+    transitions = TransitionMap()
+    transitions.add(AstConstant.any, {s1})
+    transitions.add(AstConstant.end_of_string, {s2})
+    assert transitions.lookup(0x10FFFF) == {s1}
+    assert transitions.end_of_string == {s2}
+    assert len(transitions) == 2
+
 
-    This does not necessarily mean that a == b
-    """
-    assert not _less_than(a, b)
-    assert not _less_than(b, a)
+def test_overlapping_set_items():
+    assert nfa_from_string("[a-fd-kx]").fullmatch("e")
+    assert not nfa_from_string("[a-fd-kx]").fullmatch("l")
@@ -0,0 +1,65 @@
+import random
+import re
+
+import pytest
+
+from helpers import leftmost_longest, longest_match, random_texts
+from re_automata.finite_automata import LazyDFA, nfa_from_string
+
+
+@pytest.mark.parametrize(
+    "regex, alphabet",
+    (
+        ("(a|b)*abb", "ab"),
+        ("(a|b)*a(a|b)(a|b)(a|b)(a|b)", "ab"),
+        ("[a-c]+d?|x", "abcdx"),
+        ("(ab)?c+", "abc"),
+        ("(ab+)?", "ab"),
+        ("((a)+(a)+)*", "ab"),
+        ("(a*b?)+c", "abc"),
+    ),
+)
+@pytest.mark.parametrize("max_states", (2, 5, 10_000))
+def test_agrees_with_re(regex, alphabet, max_states):
+    lazy = LazyDFA(nfa_from_string(regex), max_states=max_states)
+    for text in random_texts(alphabet, n=60, max_len=12, seed=4):
+        assert lazy.fullmatch(text) == bool(re.fullmatch(regex, text)), text
+        assert lazy.match(text) == longest_match(regex, text), text
+        assert lazy.search(text) == leftmost_longest(regex, text), text
+
+
+def test_long_texts_agree_with_nfa():
+    nfa = nfa_from_string("(a|b)*a(a|b)(a|b)(a|b)")
+    lazy = LazyDFA(nfa, max_states=5)
+    for text in random_texts("ab", n=20, max_len=200, seed=4):
+        assert lazy.fullmatch(text) == nfa.fullmatch(text), text
+        assert lazy.search(text) == nfa.search(text), text
+
+
+def test_only_reached_states_are_built():
+    nfa = nfa_from_string("(a|b)*a" + "(a|b)" * 20)
+    lazy = LazyDFA(nfa)
+    assert lazy.fullmatch("b" * 100 + "a" * 21)
+    assert lazy.nstates < 50
+    assert lazy.flushes == 0
+
+
+def test_thrashing_falls_back_to_nfa():
+    nfa = nfa_from_string("(a|b)*a" + "(a|b)" * 12)
+    lazy = LazyDFA(nfa, max_states=4, max_bad_flushes=1)
+    text = "".join(random.Random(1).choice("ab") for _ in range(500))
+    assert lazy.fullmatch(text) == nfa.fullmatch(text)
+    assert lazy.fallbacks == 1
+
+
+def test_max_states_too_small():
+    with pytest.raises(ValueError):
+        LazyDFA(nfa_from_string("a"), max_states=1)
+
+
+def test_max_memory():
+    nfa = nfa_from_string("(a|b)*a" + "(a|b)" * 12)
+    lazy = LazyDFA(nfa, max_memory=50_000)
+    assert 2 <= lazy.max_states < 10_000
+    with pytest.raises(ValueError):
+        LazyDFA(nfa, max_memory=100)
@@ -0,0 +1,72 @@
+import re
+
+import pytest
+
+from helpers import leftmost_longest, longest_match, random_texts
+from re_automata.finite_automata import nfa_from_string
+
+PATTERNS = (
+    "a",
+    "a|ab",
+    "ab|b",
+    "(a|b)*abb",
+    "a+",
+    "x*",
+    "[a-c]+d?",
+    "(ab)?c+",
+    "a.c",
+    "(a|aa)*b",
+    '"[^"]*"',
+    "[^a-c]+",
+)
+TEXTS = ("", "a", "ab", "abb", "xaab", "cab", "abcd", "aabb", "cccabc", "a\nc", "xx")
+TEXTS += ("aaab", "abababb", "bbbb", "dabd", '"x"', 'a"b"c', '""', 'x"yz', "d€f")
+
+
+@pytest.mark.parametrize("regex", PATTERNS)
+def test_fullmatch(regex):
+    nfa = nfa_from_string(regex)
+    for text in TEXTS:
+        assert nfa.fullmatch(text) == bool(re.fullmatch(regex, text, re.DOTALL))
+
+
+@pytest.mark.parametrize("regex", PATTERNS)
+def test_match(regex):
+    nfa = nfa_from_string(regex)
+    for text in TEXTS:
+        assert nfa.match(text) == longest_match(regex, text), text
+        assert nfa.search(text) == leftmost_longest(regex, text), text
+
+
+@pytest.mark.parametrize(
+    "regex",
+    ("(ab+)?", "((a)+(a)+)*", "(é(b)*)?", "(a*b?)+c", "((ab)?c)*b", "(a|ba+)+b?"),
+)
+@pytest.mark.parametrize("mode", ("thompson", "glushkov"))
+def test_nested_quantifiers_agree_with_re(regex, mode):
+    nfa = nfa_from_string(regex, mode=mode)
+    for text in random_texts("abcé", n=150, max_len=8, seed=3):
+        assert nfa.fullmatch(text) == bool(re.fullmatch(regex, text)), text
+        assert nfa.match(text) == longest_match(regex, text), text
+        assert nfa.search(text) == leftmost_longest(regex, text), text
+
+
+@pytest.mark.parametrize(
+    "regex, text, span",
+    (
+        ("a$", "aaa", (2, 3)),
+        ("a$", "aab", None),
+        ("a$|b", "ab", (1, 2)),
+        ("a$b", "ab", None),
+        ("(a|ab)(c|bcd)", "abcd", (0, 4)),
+        ("(b|b)(a)+.b$|a|[^a]|b|(a)?", "babé", (0, 1)),
+    ),
+)
+def test_search(regex, text, span):
+    assert nfa_from_string(regex).search(text) == span
+
+
+def test_no_backtracking_blowup():
+    nfa = nfa_from_string("(a|aa)*c")
+    assert not nfa.fullmatch("a" * 5000)
+    assert nfa.search("a" * 5000) is None
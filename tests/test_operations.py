@@ -0,0 +1,137 @@
+import re
+from itertools import product
+
+import pytest
+
+from re_automata.finite_automata import equivalent, includes, nfa_from_string
+
+PAIRS = (
+    ("(a|b)*abb", "a*b*"),
+    ("a+", "b+"),
+    ("[ab]c?|x$", "a|c"),
+    ("(ab)*", "(a|b)(a|b)"),
+    ("[^a]+", ".b"),
+    ("((a)+(a)+)*", "a"),
+    ("(ab+)?", "b*"),
+)
+ALPHABET = "abcx"
+
+
+def _strings(max_len=4):
+    for n in range(max_len + 1):
+        for chars in product(ALPHABET, repeat=n):
+            yield "".join(chars)
+
+
+@pytest.mark.parametrize("left, right", PAIRS)
+def test_operations_agree_with_re(left, right):
+    a = nfa_from_string(left)
+    b = nfa_from_string(right)
+    intersection = a.intersect(b)
+    difference = a.difference(b)
+    complement = a.complement()
+    for text in _strings():
+        in_a = bool(re.fullmatch(left, text, re.DOTALL))
+        in_b = bool(re.fullmatch(right, text, re.DOTALL))
+        assert intersection.fullmatch(text) == (in_a and in_b), text
+        assert difference.fullmatch(text) == (in_a and not in_b), text
+        assert complement.fullmatch(text) == (not in_a), text
+
+
+@pytest.mark.parametrize("left, right", PAIRS)
+def test_examples_are_shortest(left, right):
+    a = nfa_from_string(left)
+    b = nfa_from_string(right)
+    example = a.common_example(b)
+    common = [text for text in _strings() if a.fullmatch(text) and b.fullmatch(text)]
+    if example is None:
+        assert a.is_disjoint(b)
+        assert not common
+    else:
+        assert a.fullmatch(example) and b.fullmatch(example)
+        assert len(example) == min(map(len, common))
+
+
+def test_emptiness():
+    assert nfa_from_string("a").intersect(nfa_from_string("b")).is_empty()
+    assert nfa_from_string(".*").complement().is_empty()
+    assert not nfa_from_string("a$").is_empty()
+    assert nfa_from_string("a$b").is_empty()
+    assert nfa_from_string("ab|a").difference(nfa_from_string("a(b)?")).is_empty()
+    assert nfa_from_string("a*").example() == ""
+    assert nfa_from_string("[^a-z]").example() == "A"
+
+
+def test_products_are_explored_lazily():
+    # The subset automata of this one has over a million states
+    huge = nfa_from_string("(a|b)*a" + "(a|b)" * 20)
+    complement = huge.complement()
+    assert complement.example() == ""
+    assert not complement.is_empty()
+    assert complement.fullmatch("ab" * 30)
+    assert not complement.fullmatch("b" + "a" * 21)
+    assert nfa_from_string("a" * 22).is_subset(huge)
+
+
+@pytest.mark.parametrize("left, right", PAIRS)
+def test_to_automata(left, right):
+    a = nfa_from_string(left)
+    b = nfa_from_string(right)
+    intersection = a.intersect(b)
+    automata = intersection.to_automata()
+    assert intersection.to_automata() is automata
+    for text in _strings(3):
+        assert automata.fullmatch(text) == intersection.fullmatch(text), text
+    assert a.is_subset(b) == bool(includes(b, a))
+
+
+def test_nested_quantifiers():
+    doubled = nfa_from_string("((a)+(a)+)*")
+    assert not includes(doubled, nfa_from_string("a"))
+    assert includes(doubled, nfa_from_string("aa(a)*"))
+    assert doubled.difference(nfa_from_string("(aa+)?")).is_empty()
+
+
+EQUIVALENCE_PAIRS = PAIRS + (
+    ("(a|b)*", "(a*b*)*"),
+    ("a(ba)*", "(ab)*a"),
+    ("a$", "a"),
+    ("[a-c]", "a|b|c"),
+    ("(a|b)*abb", "(a|b)*(a|b)bb"),
+    ("a*", "a+"),
+)
+
+
+@pytest.mark.parametrize("left, right", EQUIVALENCE_PAIRS)
+def test_equivalent(left, right):
+    a = nfa_from_string(left)
+    b = nfa_from_string(right)
+    verdict = equivalent(a, b)
+    assert bool(equivalent(b, a)) == bool(verdict)
+    if verdict:
+        assert verdict.counterexample is None
+        for text in _strings():
+            assert a.fullmatch(text) == b.fullmatch(text), text
+    else:
+        example = verdict.counterexample
+        assert a.fullmatch(example) != b.fullmatch(example)
+
+
+@pytest.mark.parametrize("left, right", EQUIVALENCE_PAIRS)
+def test_includes(left, right):
+    a = nfa_from_string(left)
+    b = nfa_from_string(right)
+    for larger, smaller in ((a, b), (b, a)):
+        verdict = includes(larger, smaller)
+        assert bool(verdict) == smaller.difference(larger).is_empty()
+        if not verdict:
+            example = verdict.counterexample
+            assert smaller.fullmatch(example) and not larger.fullmatch(example)
+
+
+@pytest.mark.parametrize("regex", ("(ab+)?", "((a)+(a)+)*", "(é(b)*)?", "(a?)+b"))
+def test_constructions_are_equivalent(regex):
+    thompson = nfa_from_string(regex)
+    glushkov = nfa_from_string(regex, mode="glushkov")
+    assert equivalent(thompson, glushkov)
+    assert includes(thompson, glushkov) and includes(glushkov, thompson)
@@ -0,0 +1,58 @@
+import pytest
+
+from re_automata.finite_automata import (
+    compiled_dfa_from_string,
+    parallel_count,
+    parallel_fullmatch,
+)
+from re_automata.finite_automata.determinize import DEAD
+from re_automata.finite_automata.parallel import _scan_from
+
+from helpers import random_texts
+
+PATTERNS = (("(a|b)*abb", "ab"), (".*(ab|ba)", "abc"), ("[a-c]+d?|x$", "abcdx"))
+
+
+def _sequential(dfa, text, state):
+    count = 0
+    for c in text:
+        state = dfa.step(state, c)
+        if state == DEAD:
+            break
+        count += dfa.accepting[state]
+    return state, count
+
+
+def _matched_prefixes(dfa, text):
+    """Prefixes ending before the end of text can't use end of string edges"""
+    state, count = _sequential(dfa, text, dfa.start)
+    if state != DEAD and dfa.accepting_at_end[state] and not dfa.accepting[state]:
+        count += 1
+    return count + dfa.accepting[dfa.start]
+
+
+@pytest.mark.parametrize("regex, alphabet", PATTERNS)
+def test_scan_from_every_state(regex, alphabet):
+    dfa = compiled_dfa_from_string(regex)
+    starts = list(range(dfa.nstates))
+    for text in random_texts(alphabet, n=30, max_len=60, seed=7):
+        ends, counts = _scan_from(dfa, text, starts)
+        for s in starts:
+            assert (ends[s], counts[s]) == _sequential(dfa, text, s), (text, s)
+
+
+@pytest.mark.parametrize("regex, alphabet", PATTERNS)
+def test_agrees_with_sequential(regex, alphabet):
+    dfa = compiled_dfa_from_string(regex)
+    texts = list(random_texts(alphabet, n=10, max_len=60, seed=7))
+    for text in texts:
+        assert parallel_count(dfa, text) == _matched_prefixes(dfa, text), text
+        assert parallel_fullmatch(dfa, text) == dfa.fullmatch(text), text
+    # Only spawn processes for a few texts
+    for text in texts[:3]:
+        encoded = text.encode()
+        assert parallel_fullmatch(
+            dfa, encoded, workers=2, chunk_size=7
+        ) == dfa.fullmatch(text)
+        count = parallel_count(dfa, text, workers=2, chunk_size=5)
+        assert count == _matched_prefixes(dfa, text)
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from re_automata.finite_automata import LazyDFA, nfa_from_string
+from re_automata.finite_automata.simulation import _search
+from re_automata.regex import from_string
+from re_automata.regex.literals import MAX_LENGTH, literals
+
+
+@pytest.mark.parametrize(
+    "regex, prefixes, suffixes, factors",
+    (
+        ("abc", {"abc"}, {"abc"}, {"abc"}),
+        ("a|bc", {"a", "bc"}, {"a", "bc"}, {"a", "bc"}),
+        ("(foo|bar)x*baz", {"foo", "bar"}, {"baz"}, {"baz"}),
+        ("x*(ab)+y", None, {"aby"}, {"aby"}),
+        (
+            "[a-z]*error code[0-9]+",
+            None,
+            set("0123456789"),
+            {f"error code{d}" for d in range(10)},
+        ),
+        ("a?b*", None, None, None),
+        (".*", None, None, None),
+        ("[^a]x$", None, {"x"}, {"x"}),
+    ),
+)
+def test_literals(regex, prefixes, suffixes, factors):
+    found = literals(from_string(regex))
+    assert found.prefixes == (None if prefixes is None else frozenset(prefixes))
+    assert found.suffixes == (None if suffixes is None else frozenset(suffixes))
+    assert found.factors == (None if factors is None else frozenset(factors))
+
+
+def test_long_literals_are_cut():
+    found = literals(from_string("a" * 5000 + "b*" + "c" * 5000))
+    assert found.exact is None
+    assert found.prefixes == {"a" * MAX_LENGTH}
+    assert found.suffixes == {"c" * MAX_LENGTH}
+
+
+def test_rejects_without_running_the_automata():
+    nfa = nfa_from_string("[a-z]*error code [0-9]+")
+    assert nfa.prefilter is not None
+    assert nfa.prefilter.rejects("warning: disk 9 is full")
+    assert nfa.search("warning: disk 9 is full") is None
+    assert nfa.search("an error code 42!") == (3, 16)
+
+
+@pytest.mark.parametrize(
+    "regex, alphabet",
+    (
+        ("ab[a-c]*c", "abcx"),
+        ("(ab|ba)x+", "abx"),
+        ("x*(ab)+y", "abxy"),
+        ("a(b|c)a$", "abc"),
+        ("[a-c]*cab[a-c]*", "abc"),
+    ),
+)
+def test_agrees_without_prefilter(regex, alphabet):
+    nfa = nfa_from_string(regex)
+    lazy = LazyDFA(nfa)
+    rand = random.Random(7)
+    for _ in range(200):
+        text = "".join(rand.choice(alphabet) for _ in range(rand.randint(0, 30)))
+        expected = _search(nfa.tables, text)
+        assert nfa.search(text) == expected, text
+        assert lazy.search(text) == expected, text
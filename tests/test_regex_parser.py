@@ -27,7 +27,7 @@ def test_char():
 
 def test_concat_chars():
     assert from_string("aa") == Concat(Char("a"), Char("a"))
-    assert from_string("aba") == Concat(Char("a"), Concat(Char("b"), Char("a")))
+    assert from_string("aba") == Concat(Char("a"), Char("b"), Char("a"))
 
 
 def test_or_chars():
@@ -35,6 +35,30 @@ def test_or_chars():
     assert from_string("ab|01") == Or(from_string("ab"), from_string("01"))
 
 
+def test_nested_are_flat():
+    assert from_string("a|bc|d") == Or(
+        Char("a"), Concat(Char("b"), Char("c")), Char("d")
+    )
+    assert from_string("a(b|c)d*") == Concat(
+        Char("a"), Group(Or(Char("b"), Char("c"))), Kleene(Char("d"))
+    )
+    assert from_string("((a))+") == Plus(Group(Group(Char("a"))))
+
+
+def test_long_patterns():
+    assert from_string("a" * 5000) == Concat(*[Char("a")] * 5000)
+    assert len(from_string("|".join(["ab"] * 3000)).items) == 3000
+    assert from_string("(" * 2000 + "a" + ")" * 2000) is not None
+
+
+@pytest.mark.parametrize(
+    "regex", ("", "a|", "|a", "a||b", "()", "(a", "a)", "a**", "(a|)")
+)
+def test_invalid(regex):
+    with pytest.raises(ValueError):
+        from_string(regex)
+
+
 def test_kleene_star_char():
     assert from_string("a*") == Kleene(Char("a"))
 
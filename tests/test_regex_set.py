@@ -0,0 +1,67 @@
+import re
+
+from re_automata.finite_automata import RegexSet, compiled_dfa_from_string
+
+PATTERNS = (
+    "a",
+    "abc|abd",
+    "(a|b)*abb",
+    "[a-z]+x",
+    "a.c",
+    "a$",
+    "[0-9]+",
+    "a",
+)
+TEXTS = ("", "a", "ab", "abb", "abd", "ax", "abc", "a\nc", "zzzx", "42", "b a")
+TEXTS += ("x1", "babb!", "åäö a", "abcx")
+
+
+def test_fullmatch_agrees_with_re():
+    regex_set = RegexSet(PATTERNS)
+    for text in TEXTS:
+        expected = [
+            i
+            for i, pattern in enumerate(PATTERNS)
+            if re.fullmatch(pattern, text, re.DOTALL)
+        ]
+        assert regex_set.fullmatch(text) == expected, text
+
+
+def test_match_agrees_with_re():
+    regex_set = RegexSet(PATTERNS)
+    for text in TEXTS:
+        expected = [
+            i
+            for i, pattern in enumerate(PATTERNS)
+            if re.match(pattern, text, re.DOTALL)
+        ]
+        assert regex_set.match(text) == expected, text
+
+
+def test_search_agrees_with_re():
+    regex_set = RegexSet(PATTERNS)
+    for text in TEXTS:
+        expected = [
+            i
+            for i, pattern in enumerate(PATTERNS)
+            if re.search(pattern, text, re.DOTALL)
+        ]
+        assert regex_set.search(text) == expected, text
+
+
+def test_minimization_keeps_patterns_apart():
+    # Both patterns match the same strings, but the states accepting them differ
+    regex_set = RegexSet(["ab|ac", "a[bc]"])
+    assert regex_set.fullmatch("ab") == [0, 1]
+    regex_set = RegexSet(["ab", "ac"])
+    assert regex_set.fullmatch("ab") == [0]
+    assert regex_set.fullmatch("ac") == [1]
+    # A single pattern DFA would merge the two accepting states
+    assert regex_set._anchored.nstates == compiled_dfa_from_string("a[bc]").nstates + 1
+
+
+def test_empty_set():
+    regex_set = RegexSet([])
+    assert len(regex_set) == 0
+    assert regex_set.fullmatch("a") == []
+    assert regex_set.search("a") == []
@@ -0,0 +1,61 @@
+import pickle
+
+import pytest
+
+from re_automata.finite_automata import (
+    CompiledDFA,
+    RegexSet,
+    compiled_dfa_from_string,
+)
+
+PATTERNS = ("(a|b)*abb", "[0-9]+(\\.[0-9]*)?", "a$|ሴ+")
+TEXTS = ("", "abb", "ab", "3.14", "42", "a", "ሴሴ", "aሴ")
+
+
+@pytest.mark.parametrize("regex", PATTERNS)
+def test_round_trip(regex, tmp_path):
+    dfa = compiled_dfa_from_string(regex)
+    path = tmp_path / "dfa.bin"
+    dfa.save(path)
+    loaded = CompiledDFA.load(path, pattern=regex)
+    assert loaded.nstates == dfa.nstates
+    assert loaded.nclasses == dfa.nclasses
+    assert list(loaded.table) == list(dfa.table)
+    assert isinstance(loaded.table, memoryview)
+    for text in TEXTS:
+        assert loaded.fullmatch(text) == dfa.fullmatch(text), text
+    # Loaded DFAs can still be sent to other processes
+    assert list(pickle.loads(pickle.dumps(loaded)).table) == list(dfa.table)
+
+
+def test_tags_round_trip(tmp_path):
+    dfa = RegexSet(["a", "ab|b", "a"])._anchored
+    path = tmp_path / "dfa.bin"
+    dfa.save(path)
+    loaded = CompiledDFA.load(path)
+    assert loaded.tag_sets == dfa.tag_sets
+    assert list(loaded.state_tags) == list(dfa.state_tags)
+    assert list(loaded.state_tags_at_end) == list(dfa.state_tags_at_end)
+
+
+def test_stale_and_corrupt_files(tmp_path):
+    path = tmp_path / "dfa.bin"
+    compiled_dfa_from_string("abc").save(path)
+    with pytest.raises(ValueError, match="compiled from"):
+        CompiledDFA.load(path, pattern="abd")
+
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 1
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="checksum"):
+        CompiledDFA.load(path)
+    CompiledDFA.load(path, verify=False)
+
+    # Cut inside the transition table, which the checksum isn't checked against
+    path.write_bytes(data[: len(data) // 2])
+    with pytest.raises(ValueError, match="truncated"):
+        CompiledDFA.load(path, verify=False)
+
+    path.write_bytes(b"not a dfa" * 10)
+    with pytest.raises(ValueError, match="not a compiled DFA"):
+        CompiledDFA.load(path)
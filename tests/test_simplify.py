@@ -0,0 +1,52 @@
+import pytest
+
+from re_automata.finite_automata import equivalent
+from re_automata.finite_automata.glushkov import _glushkov
+from re_automata.regex import from_string
+from re_automata.regex.simplify import simplify
+
+
+@pytest.mark.parametrize(
+    "regex, simplified",
+    (
+        ("((ab))c", "abc"),
+        ("a|b|c", "[a-c]"),
+        ("a|[b-d]|x", "[a-dx]"),
+        ("foobar|foobaz", "fooba[rz]"),
+        ("abc|xbc", "[ax]bc"),
+        ("ab|a", "ab?"),
+        ("ab|b", "a?b"),
+        ("(x*)*", "x*"),
+        ("(x+)?", "x*"),
+        ("((x?)?)+", "x*"),
+        ("(a|b)+|(a|b)+", "[a-b]+"),
+    ),
+)
+def test_rewrites(regex, simplified):
+    assert simplify(from_string(regex)) is from_string(simplified)
+
+
+@pytest.mark.parametrize(
+    "regex",
+    (
+        "if|in|int|for|float|while",
+        "(ab|a)(c|bc)",
+        "((a*)*|b)+c",
+        "x$|y$|z",
+        "a(b|c)d|a(b|c)e|[^a]",
+    ),
+)
+def test_same_language(regex):
+    raw = from_string(regex)
+    assert equivalent(_glushkov(raw), _glushkov(simplify(raw)))
+
+
+def test_keywords_get_smaller():
+    keywords = "|".join(f"key{i}word" for i in range(100))
+    raw = from_string(keywords)
+    assert len(_glushkov(simplify(raw)).states) < len(_glushkov(raw).states) // 10
+
+
+def test_long_patterns():
+    regex = from_string("(" * 2000 + "a" + ")" * 2000 + "|b" * 2000)
+    assert simplify(regex) is from_string("[a-b]")
@@ -0,0 +1,44 @@
+from re_automata.finite_automata import (
+    compile_cache,
+    compiled_dfa_from_string,
+    nfa_from_string,
+)
+from re_automata.stats import collect_stats, current_stats
+
+
+def test_phases_are_recorded():
+    compile_cache.purge()
+    with collect_stats() as stats:
+        compiled_dfa_from_string("(a|b)*abb")
+        compiled_dfa_from_string("(a|b)*abb")
+    phases = stats.phases
+    names = ("parse", "simplify", "glushkov", "tables", "determinize", "minimize")
+    for name in (*names, "compile"):
+        assert phases[name].calls == 1, name
+        assert phases[name].seconds >= 0
+    assert phases["glushkov"].counts["states"] == 5
+    assert phases["determinize"].counts["peak_subset_size"] == 2
+    assert phases["compile"].counts["states"] == 4
+    assert phases["minimize"].counts["states_before"] == 6
+    # The glushkov NFA and the compiled DFA miss, then the compiled DFA hits
+    assert phases["cache"].counts == {"hits": 1, "misses": 2}
+    assert stats.cache_hit_rate == 1 / 3
+
+
+def test_thompson_and_splits():
+    compile_cache.purge()
+    with collect_stats() as stats:
+        nfa_from_string("ab|c", mode="thompson")
+        # Both first positions are edges of the initial state, and overlap
+        nfa_from_string("[a-f]x|[c-z]y", mode="glushkov")
+    assert stats.phases["thompson"].counts == {"states": 8, "transitions": 7}
+    assert stats.phases["add_transition"].counts["splits"] == 1
+
+
+def test_callback_and_disabled():
+    calls = []
+    with collect_stats(callback=lambda *args: calls.append(args)):
+        compile_cache.purge()
+        nfa_from_string("ab", mode="glushkov")
+    assert [name for name, _, _ in calls] == ["cache", "parse", "simplify", "glushkov"]
+    assert current_stats() is None
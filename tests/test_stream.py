@@ -0,0 +1,116 @@
+import asyncio
+import mmap
+
+import pytest
+
+from re_automata.finite_automata import (
+    StreamMatcher,
+    compiled_dfa_from_string,
+    match_stream,
+    nfa_from_string,
+)
+
+PATTERNS = ("(a|b)*abb", "[a-c]+d?|x$", "(ab)?c+", "a.c")
+TEXTS = ("", "abb", "aabbabb", "abcd", "x", "xy", "ab", "abccc", "a\nc", "abbab")
+
+
+def _chunks(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("regex", PATTERNS)
+@pytest.mark.parametrize("size", (1, 2, 100))
+def test_agrees_with_re(regex, size):
+    dfa = compiled_dfa_from_string(regex)
+    nfa = nfa_from_string(regex)
+    for text in TEXTS:
+        matcher = StreamMatcher(dfa)
+        for chunk in _chunks(text, size):
+            matcher.feed(chunk)
+        assert matcher.finish() == dfa.fullmatch(text), text
+        assert matcher.position == len(text)
+        span = nfa.match(text)
+        assert matcher.match_end == (span and span[1]), text
+
+
+@pytest.mark.parametrize("utf8, length", ((False, 10), (True, 11)))
+def test_bytes_like_chunks(utf8, length):
+    dfa = compiled_dfa_from_string("[a-z]+é?[0-9]*", utf8=utf8)
+    encoded = "é".encode("utf-8")
+    matcher = StreamMatcher(dfa)
+    matcher.feed(b"abc")
+    # Split in the middle of the character
+    matcher.feed(bytearray(encoded[:1]))
+    matcher.feed(encoded[1:])
+    matcher.feed(memoryview(b"0123"))
+    matcher.feed("45")
+    assert matcher.finish()
+    assert matcher.position == length
+
+
+@pytest.mark.parametrize("utf8", (False, True))
+def test_positions_count_bytes_of_wide_memoryviews(utf8):
+    dfa = compiled_dfa_from_string("a*", utf8=utf8)
+    chunk = memoryview(b"aaaa" * 2).cast("i")
+    matcher = StreamMatcher(dfa)
+    matcher.feed(chunk)
+    assert matcher.position == 8
+    matcher.feed(b"b")
+    assert matcher.dead
+    # Whatever is fed after the DFA died is still counted the same way
+    matcher.feed(chunk)
+    assert matcher.position == 17
+    assert not matcher.finish()
+
+
+def test_truncated_utf8():
+    matcher = StreamMatcher(compiled_dfa_from_string(".*"))
+    matcher.feed("é".encode("utf-8")[:1])
+    with pytest.raises(UnicodeDecodeError):
+        matcher.finish()
+
+
+def test_mmap_chunk(tmp_path):
+    path = tmp_path / "input"
+    path.write_bytes(b"ab" * 1000 + b"abb")
+    dfa = compiled_dfa_from_string("(a|b)*abb")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        matcher = StreamMatcher(dfa)
+        matcher.feed(m)
+    assert matcher.finish()
+
+
+def test_search_positions():
+    dfa = compiled_dfa_from_string(".*(error)")
+    matcher = StreamMatcher(dfa)
+    for chunk in ("no err", "or here, another ", "error"):
+        matcher.feed(chunk)
+    matcher.finish()
+    assert matcher.first_match_end == 8
+    assert matcher.match_end == 28
+
+
+def test_stops_when_dead():
+    matcher = StreamMatcher(compiled_dfa_from_string("ab"))
+    matcher.feed("ac")
+    assert matcher.dead
+    matcher.feed("ab")
+    assert not matcher.finish()
+    assert matcher.position == 4
+    with pytest.raises(ValueError):
+        matcher.feed("a")
+
+
+def test_match_stream():
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"ab" * 10)
+        reader.feed_data(b"b")
+        reader.feed_eof()
+        return await match_stream(
+            compiled_dfa_from_string("(a|b)*abb"), reader, chunk_size=3
+        )
+
+    matcher = asyncio.run(run())
+    assert matcher.finish()
+    assert matcher.position == 21
@@ -0,0 +1,128 @@
+import mmap
+import pickle
+import random
+
+import pytest
+
+from re_automata.finite_automata import (
+    CompiledDFA,
+    StreamMatcher,
+    compiled_dfa_from_string,
+    nfa_from_string,
+    parallel_fullmatch,
+)
+from re_automata.finite_automata.utf8 import _utf8_sequences
+
+
+@pytest.mark.parametrize(
+    "lo, hi",
+    ((0, 0x7F), (0x41, 0x3B1), (0x7FF, 0x800), (0xD000, 0xE100), (0xFFF0, 0x10100)),
+)
+def test_sequences_cover_the_encodings(lo, hi):
+    sequences = _utf8_sequences(lo, hi)
+    encodings = {
+        chr(cp).encode("utf-8")
+        for cp in range(lo, hi + 1)
+        if not 0xD800 <= cp <= 0xDFFF
+    }
+    covered = 0
+    for sequence in sequences:
+        size = 1
+        for start, end in sequence:
+            assert start <= end
+            size *= end - start + 1
+        covered += size
+    assert covered == len(encodings)
+    for encoded in encodings:
+        assert any(
+            len(sequence) == len(encoded)
+            and all(s <= b <= e for b, (s, e) in zip(encoded, sequence))
+            for sequence in sequences
+        ), encoded
+
+
+def test_whole_code_point_space():
+    # The same 9 sequences as RE2, with the surrogates and overlong forms left out
+    sequences = _utf8_sequences(0, 0x10FFFF)
+    assert len(sequences) == 9
+    assert ((0xED, 0xED), (0x80, 0x9F), (0x80, 0xBF)) in sequences
+
+
+@pytest.mark.parametrize(
+    "regex",
+    ("a.c", "[^a-c]+", "[α-ω]+x?", "(€|£)[0-9]+", "[ࠀ-\U00010400]*$", ".*😀"),
+)
+def test_agrees_with_code_points(regex):
+    nfa = nfa_from_string(regex)
+    dfa = compiled_dfa_from_string(regex, utf8=True)
+    alphabet = "abcxyz019αβω€£߿ࠀ￿\U00010000\U0010ffff😀"
+    rand = random.Random(11)
+    for _ in range(300):
+        text = "".join(rand.choice(alphabet) for _ in range(rand.randint(0, 6)))
+        assert dfa.fullmatch(text.encode("utf-8")) == nfa.fullmatch(text), text
+
+
+def test_invalid_utf8_never_matches():
+    dfa = compiled_dfa_from_string(".*", utf8=True)
+    assert dfa.fullmatch("é😀".encode("utf-8"))
+    assert not dfa.fullmatch(b"\xff")
+    assert not dfa.fullmatch("é".encode("utf-8")[:1])
+    assert not dfa.fullmatch("\ud800".encode("utf-8", "surrogatepass"))
+
+
+def test_runs_over_mmaps(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes("prix: 42€\n".encode("utf-8") * 1000)
+    dfa = compiled_dfa_from_string("(prix: [0-9]+€\n)+", utf8=True)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        assert dfa.fullmatch(m)
+        matcher = StreamMatcher(dfa)
+        matcher.feed(m)
+        assert matcher.finish()
+
+
+@pytest.mark.parametrize("utf8", (False, True))
+def test_either_kind_of_input(utf8):
+    dfa = compiled_dfa_from_string("[é€]+x", utf8=utf8)
+    assert dfa.utf8 == utf8
+    for text, expected in (("é€x", True), ("éx€", False), ("x", False)):
+        assert dfa.fullmatch(text) == expected, text
+        assert dfa.fullmatch(text.encode("utf-8")) == expected, text
+        assert dfa.codegen()(text) == expected, text
+        assert dfa.codegen()(text.encode("utf-8")) == expected, text
+        matcher = StreamMatcher(dfa)
+        matcher.feed(text)
+        assert matcher.finish() == expected, text
+    # Match ends are counted in what the DFA reads
+    assert dfa.codegen("match")("€x!") == (4 if utf8 else 2)
+    assert not dfa.fullmatch("\ud800x")
+
+
+def test_invalid_utf8_is_rejected_by_code_point_dfas():
+    dfa = compiled_dfa_from_string(".*")
+    with pytest.raises(UnicodeDecodeError):
+        dfa.fullmatch(b"\xff")
+
+
+@pytest.mark.parametrize("utf8", (False, True))
+def test_parallel_and_batch(utf8):
+    dfa = compiled_dfa_from_string("(.€)*", utf8=utf8)
+    texts = ["", "a€", "é€ß€", "€", "a€b"]
+    for text in texts:
+        expected = dfa.fullmatch(text)
+        assert parallel_fullmatch(dfa, text) == expected, text
+        assert parallel_fullmatch(dfa, text.encode("utf-8")) == expected, text
+    np = pytest.importorskip("numpy")
+    result = dfa.match_many(texts)
+    assert result.dtype == np.bool_
+    assert result.tolist() == [True, True, True, False, False]
+
+
+def test_flag_is_saved(tmp_path):
+    path = tmp_path / "dfa.bin"
+    compiled_dfa_from_string("é", utf8=True).save(path)
+    loaded = CompiledDFA.load(path)
+    assert loaded.utf8
+    assert loaded.fullmatch("é")
+    assert loaded.fullmatch("é".encode("utf-8"))
+    assert pickle.loads(pickle.dumps(loaded)).utf8